@@ -9,19 +9,66 @@ Vereinfachtes 3-Rollen-System:
 
 from fastapi import HTTPException, Depends
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Iterable, List, Optional
 import models
 from models import UserRole
 
 
+# ==================== MEMBERSHIP CACHE ====================
+
+# Mitgliedschaften werden nur pro Request (Session, db.info) gecacht. Ein
+# prozessweiter Cache wäre bei mehreren Uvicorn-Workern nicht zuverlässig
+# invalidierbar: entfernte Mitglieder hätten in anderen Workern weiter Zugriff.
+
+
+def invalidate_membership_cache(db: Session, user_id: Optional[int] = None):
+    """
+    Verwirft die im Request geladenen Mitgliedschaften - nach Änderungen an
+    ProjectMember aufrufen. Ohne user_id werden alle User verworfen
+    (z.B. beim Löschen eines Projekts).
+    """
+    request_cache = db.info.get("visible_project_ids", {})
+    if user_id is None:
+        request_cache.clear()
+    else:
+        request_cache.pop(user_id, None)
+
+
+def _load_member_project_ids(db: Session, user_id: int) -> frozenset:
+    return frozenset(
+        project_id for (project_id,) in db.query(models.ProjectMember.project_id).filter(
+            models.ProjectMember.user_id == user_id
+        ).all()
+    )
+
+
 # ==================== HELPER FUNCTIONS ====================
 
+def get_member_project_ids(db: Session, user_id: int) -> frozenset:
+    """
+    IDs aller Projekte, in denen der User Mitglied ist.
+    Wird pro Request (Session) nur einmal geladen, danach sind Checks Set-Lookups.
+    """
+    request_cache = db.info.setdefault("visible_project_ids", {})
+    if user_id not in request_cache:
+        request_cache[user_id] = _load_member_project_ids(db, user_id)
+    return request_cache[user_id]
+
+
+def get_visible_project_ids(db: Session, user: models.Users) -> Optional[frozenset]:
+    """
+    IDs aller Projekte, die der User sehen darf.
+    - Admin: None (keine Einschränkung)
+    - Employee/Guest: Projekte mit Mitgliedschaft
+    """
+    if user.is_admin:
+        return None
+    return get_member_project_ids(db, user.id)
+
+
 def is_project_member(db: Session, user_id: int, project_id: int) -> bool:
     """Prüft ob ein User Mitglied eines Projekts ist"""
-    return db.query(models.ProjectMember).filter(
-        models.ProjectMember.user_id == user_id,
-        models.ProjectMember.project_id == project_id
-    ).first() is not None
+    return project_id in get_member_project_ids(db, user_id)
 
 
 def get_user_projects(db: Session, user: models.Users) -> List:
@@ -55,6 +102,17 @@ def can_view_project(db: Session, user: models.Users, project_id: int) -> bool:
     return is_project_member(db, user.id, project_id)
 
 
+def filter_viewable(db: Session, user: models.Users, project_ids: Iterable[int]) -> List[int]:
+    """
+    Bulk-Variante von can_view_project: Gibt die sichtbaren IDs aus
+    `project_ids` zurück (Reihenfolge bleibt erhalten).
+    """
+    visible = get_visible_project_ids(db, user)
+    if visible is None:
+        return list(project_ids)
+    return [project_id for project_id in project_ids if project_id in visible]
+
+
 def can_edit_project(db: Session, user: models.Users, project_id: int) -> bool:
     """
     Kann der User dieses Projekt bearbeiten?
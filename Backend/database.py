@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
@@ -13,4 +13,103 @@ engine = create_engine(URL_DATABASE)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+def get_db():
+    """
+    Dependency: Eine Session pro Request.
+    FastAPI cached Dependencies pro Request, daher teilen sich Route und
+    weitere Dependencies (z.B. get_current_user) dieselbe Session und damit
+    auch deren Identity Map.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+_pg_trgm_available = None
+
+
+def ensure_extensions():
+    """
+    Aktiviert pg_trgm (Trigramm-Indizes für die unscharfe User-Suche).
+    Fehlen die Rechte dafür, funktioniert die Suche weiter, nur ohne
+    Trigramm-Index und Ähnlichkeitssuche.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except Exception as e:
+        print(f"pg_trgm extension not available: {e}")
+
+
+def pg_trgm_installed(bind) -> bool:
+    """Ist die Extension pg_trgm in der Datenbank von `bind` installiert?"""
+    if bind is None or bind.dialect.name != "postgresql":
+        return False
+    return bind.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first() is not None
+
+
+def has_pg_trgm() -> bool:
+    """Wie pg_trgm_installed(), für die Engine einmalig ermittelt"""
+    global _pg_trgm_available
+    if _pg_trgm_available is None:
+        if engine.dialect.name != "postgresql":
+            _pg_trgm_available = False
+        else:
+            with engine.connect() as conn:
+                _pg_trgm_available = pg_trgm_installed(conn)
+    return _pg_trgm_available
+
+
+# Spalten, die früher NOT NULL waren und inzwischen nullable sind
+# (Bilddaten liegen jetzt im Blob Store, image_data nur noch für Altbestand)
+RELAXED_NOT_NULL_COLUMNS = {
+    ("project_images", "image_data"),
+    ("profile_pictures", "image_data"),
+}
+
+
+def ensure_columns():
+    """
+    Ergänzt bestehende Tabellen um neue (nullable) Spalten und entfernt NOT NULL
+    bei den in RELAXED_NOT_NULL_COLUMNS aufgeführten Spalten.
+    create_all() legt nur neue Tabellen an, bestehende Tabellen werden nicht verändert.
+    Andere Abweichungen zwischen Model und Schema werden nicht angefasst.
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"]: c for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.primary_key or not column.nullable:
+                    continue
+                if column.name not in existing:
+                    conn.execute(text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {preparer.format_column(column)} {column.type.compile(dialect=engine.dialect)}"
+                    ))
+                elif (table.name, column.name) in RELAXED_NOT_NULL_COLUMNS and not existing[column.name]["nullable"]:
+                    conn.execute(text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ALTER COLUMN {preparer.format_column(column)} DROP NOT NULL"
+                    ))
+
+
+def ensure_indexes():
+    """
+    Legt fehlende Indizes an.
+    create_all() erstellt Indizes nur zusammen mit neuen Tabellen,
+    bestehende Tabellen bekommen neue Indizes erst hierüber.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
@@ -0,0 +1,61 @@
+"""
+Massen-Import von Usern aus einer CSV- oder JSON-Datei (z.B. beim Onboarding eines Kunden).
+
+Aufruf (im Backend-Verzeichnis):
+    python import_users.py users.csv [--dry-run]
+
+Format siehe utils/user_import.py. Fehlerhafte Zeilen werden übersprungen
+und mit Zeilennummer ausgegeben, alle gültigen Zeilen in einer Transaktion
+angelegt. Die Passwörter werden parallel im Prozess-Pool gehasht
+(Anzahl Prozesse: PASSWORD_WORKERS).
+"""
+import argparse
+import os
+import sys
+from database import SessionLocal
+from utils.security import hash_passwords, shutdown_password_pool
+from utils.user_import import parse_import_file, validate_import_rows, insert_users, ImportFormatError
+
+
+def import_file(path: str, dry_run: bool = False) -> int:
+    """Importiert die User aus `path`, gibt die Anzahl fehlerhafter Zeilen zurück"""
+    with open(path, "rb") as f:
+        rows = parse_import_file(f.read(), os.path.basename(path))
+
+    db = SessionLocal()
+    try:
+        valid, errors = validate_import_rows(db, rows)
+        db.rollback()
+        for error in errors:
+            print(f"Row {error['row']} ({error['email']}): {error['error']}")
+
+        if dry_run:
+            print(f"[dry-run] {len(valid)} users would be created, {len(errors)} rows with errors")
+            return len(errors)
+
+        print(f"Hashing {len(valid)} passwords...")
+        hashes = hash_passwords([row.password for _, row in valid])
+        created = insert_users(db, valid, hashes)
+        db.commit()
+        print(f"Done: {len(created)} users created, {len(errors)} rows with errors")
+        return len(errors)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        shutdown_password_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="User aus CSV/JSON importieren")
+    parser.add_argument("file")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        failed = import_file(args.file, args.dry_run)
+    except ImportFormatError as e:
+        print(f"Error: {e}")
+        sys.exit(2)
+    sys.exit(1 if failed else 0)
@@ -1,13 +1,20 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import models
-from database import engine
+from database import engine, ensure_extensions, ensure_columns, ensure_indexes
+from utils.images import shutdown_image_pool
+from utils.security import shutdown_password_pool, password_pool_stats
+from utils.upload_sessions import cleanup_loop
 
 # Route Imports
-from routes import users, auth, projects, project_members, project_todos, user_todos, contracts, project_images
+from routes import users, auth, projects, project_members, project_todos, project_milestone, user_todos, contracts, project_images, dashboard, calendar
 
 # Erstelle Datenbank-Tabellen
+ensure_extensions()
 models.Base.metadata.create_all(bind=engine)
+ensure_columns()
+ensure_indexes()
 
 # FastAPI App Initialisierung
 app = FastAPI(
@@ -20,8 +27,11 @@ app = FastAPI(
         {"name": "Projects"},
         {"name": "Project Members"},
         {"name": "Project TODOs"},
+        {"name": "Project Milestones"},
         {"name": "User TODOs"},
         {"name": "Project Images"},
+        {"name": "Dashboard"},
+        {"name": "Calendar"},
     ]
 )
 
@@ -41,8 +51,26 @@ app.include_router(auth.router)
 app.include_router(projects.router)
 app.include_router(project_members.router)
 app.include_router(project_todos.router)
+app.include_router(project_milestone.router)
 app.include_router(user_todos.router)
 app.include_router(contracts.router)
+app.include_router(dashboard.router)
+app.include_router(calendar.router)
+
+_background_tasks = []
+
+# Abgelaufene Resumable-Upload-Sessions beim Start und danach regelmäßig aufräumen
+@app.on_event("startup")
+async def startup():
+    _background_tasks.append(asyncio.create_task(cleanup_loop()))
+
+# Hintergrund-Tasks und Worker der Bildverarbeitung / des Passwort-Hashings sauber beenden
+@app.on_event("shutdown")
+def shutdown():
+    for task in _background_tasks:
+        task.cancel()
+    shutdown_image_pool()
+    shutdown_password_pool()
 
 # Root Endpoint
 @app.get("/")
@@ -58,3 +86,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+# Auslastung des Passwort-Pools (Queue-Länge, Wartezeiten, abgelehnte Anfragen)
+@app.get("/health/password-pool")
+async def password_pool_health():
+    return {"status": "ok", "password_pool": password_pool_stats()}
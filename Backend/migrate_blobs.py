@@ -0,0 +1,77 @@
+"""
+Migration: Projekt- und Profilbilder aus der DB (image_data) in den Blob Store verschieben.
+
+Aufruf (im Backend-Verzeichnis):
+    python migrate_blobs.py [--batch-size 50] [--dry-run] [--rebuild-refs]
+
+--rebuild-refs berechnet zusätzlich alle Referenzzähler (stored_blobs) aus den
+Tabellen neu, z.B. für Bilder von vor Einführung der Zählung. Nicht ausführen,
+während gleichzeitig Bilder hochgeladen oder gelöscht werden.
+
+Die Bilder werden in ID-Batches verarbeitet und pro Batch committed, die
+Migration kann also jederzeit abgebrochen und erneut gestartet werden.
+Thumbnails werden nicht vorab erzeugt, sondern beim ersten Abruf.
+"""
+import argparse
+from sqlalchemy.orm import undefer
+from database import SessionLocal, ensure_columns
+from utils.blob_store import get_blob_store
+from utils.blob_refs import attach_blob, rebuild_blob_refs
+from models import ProjectImage, ProfilePicture
+
+
+def migrate_images(model, batch_size: int = 50, dry_run: bool = False) -> int:
+    """Verschiebt alle Zeilen von `model` (ProjectImage/ProfilePicture) mit image_data in den Blob Store"""
+    store = get_blob_store()
+    db = SessionLocal()
+    migrated = 0
+    last_id = 0
+    try:
+        while True:
+            images = db.query(model).options(undefer(model.image_data)).filter(
+                model.id > last_id,
+                model.storage_key.is_(None),
+                model.image_data.isnot(None)
+            ).order_by(model.id).limit(batch_size).all()
+            if not images:
+                break
+
+            for image in images:
+                last_id = image.id
+                if dry_run:
+                    print(f"[dry-run] {model.__tablename__} {image.id}: {len(image.image_data)} bytes")
+                    continue
+                image.storage_key = store.put(image.image_data)
+                if hasattr(image, "file_size"):
+                    image.file_size = len(image.image_data)
+                attach_blob(db, image.storage_key, len(image.image_data))
+                image.image_data = None
+            migrated += len(images)
+
+            if not dry_run:
+                db.commit()
+            db.expunge_all()
+            print(f"{model.__tablename__}: {migrated} images processed")
+    finally:
+        db.close()
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Projekt- und Profilbilder in den Blob Store migrieren")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--rebuild-refs", action="store_true")
+    args = parser.parse_args()
+
+    ensure_columns()
+    for model in (ProjectImage, ProfilePicture):
+        total = migrate_images(model, args.batch_size, args.dry_run)
+        print(f"Done: {total} {model.__tablename__} {'would be ' if args.dry_run else ''}migrated")
+
+    if args.rebuild_refs and not args.dry_run:
+        db = SessionLocal()
+        try:
+            print(f"Done: reference counts rebuilt for {rebuild_blob_refs(db)} blobs")
+        finally:
+            db.close()
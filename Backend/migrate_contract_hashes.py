@@ -0,0 +1,59 @@
+"""
+Migration: pdf_hash (SHA-256, ETag für den PDF-Download) für Verträge nachtragen,
+deren PDF vor Einführung der Spalte erzeugt wurde.
+
+Aufruf (im Backend-Verzeichnis):
+    python migrate_contract_hashes.py [--batch-size 50] [--dry-run]
+
+Die Verträge werden in ID-Batches verarbeitet und pro Batch committed, die
+Migration kann also jederzeit abgebrochen und erneut gestartet werden.
+Bis dahin werden diese PDFs ohne ETag ausgeliefert.
+"""
+import argparse
+import hashlib
+from sqlalchemy.orm import undefer
+from database import SessionLocal, ensure_columns
+from models import Contract
+
+
+def backfill_pdf_hashes(batch_size: int = 50, dry_run: bool = False) -> int:
+    """Berechnet pdf_hash für alle Verträge mit PDF und ohne Hash"""
+    db = SessionLocal()
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            contracts = db.query(Contract).options(undefer(Contract.pdf_content)).filter(
+                Contract.id > last_id,
+                Contract.pdf_hash.is_(None),
+                Contract.pdf_content.isnot(None)
+            ).order_by(Contract.id).limit(batch_size).all()
+            if not contracts:
+                break
+
+            for contract in contracts:
+                last_id = contract.id
+                if dry_run:
+                    print(f"[dry-run] contract {contract.id}: {len(contract.pdf_content)} bytes")
+                    continue
+                contract.pdf_hash = hashlib.sha256(contract.pdf_content).hexdigest()
+            updated += len(contracts)
+
+            if not dry_run:
+                db.commit()
+            db.expunge_all()
+            print(f"contracts: {updated} PDFs processed")
+    finally:
+        db.close()
+    return updated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="pdf_hash für bestehende Vertrags-PDFs nachtragen")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    ensure_columns()
+    total = backfill_pdf_hashes(args.batch_size, args.dry_run)
+    print(f"Done: {total} contracts {'would be ' if args.dry_run else ''}updated")
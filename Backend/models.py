@@ -1,9 +1,33 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, DateTime, Float, Date, LargeBinary, ARRAY
-from database import Base
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, Text, DateTime, Float, Date, LargeBinary, ARRAY, Index, func, literal_column
+from database import Base, pg_trgm_installed
 from datetime import datetime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, column_property
 
 
+def _trigram_index(name, column):
+    """GIN-Trigramm-Index auf lower(column), nur auf PostgreSQL mit pg_trgm"""
+    label = f"{column.name}_lower"
+    return Index(
+        name,
+        func.lower(column).label(label),
+        postgresql_using='gin',
+        postgresql_ops={label: 'gin_trgm_ops'}
+    ).ddl_if(callable_=lambda ddl, target, bind, **kw: pg_trgm_installed(bind))
+
+
+def _prefix_index(name, column):
+    """Index auf lower(column) für Präfix-Suche per LIKE 'abc%'"""
+    label = f"{column.name}_lower"
+    return Index(name, func.lower(column).label(label), postgresql_ops={label: 'text_pattern_ops'})
+
+
+def name_sort_key(column):
+    """
+    Sortierausdruck für optionale Namen: case-insensitive, NULL als ''.
+    Query und Index müssen exakt denselben Ausdruck verwenden, sonst nutzt
+    PostgreSQL den Index nicht (daher '' als Literal statt Bind-Parameter).
+    """
+    return func.coalesce(func.lower(column), literal_column("''"))
 
 class Users(Base):
     __tablename__ = 'users'
@@ -28,6 +52,21 @@ class Users(Base):
     reset_code_expires = Column(Integer, nullable=True)  # Unix timestamp
 
     # Properties für RBAC
+    # Indizes für die User-Suche in GET /users: Präfix (text_pattern_ops),
+    # Teilstring und Ähnlichkeit (Trigramme), Rollenfilter, Sortierung (Keyset-Pagination)
+    __table_args__ = (
+        _prefix_index('ix_users_lower_email_prefix', email),
+        _prefix_index('ix_users_lower_first_name_prefix', first_name),
+        _prefix_index('ix_users_lower_last_name_prefix', last_name),
+        _trigram_index('ix_users_lower_email_trgm', email),
+        _trigram_index('ix_users_lower_first_name_trgm', first_name),
+        _trigram_index('ix_users_lower_last_name_trgm', last_name),
+        Index('ix_users_role_id', 'role', 'id'),
+        Index('ix_users_lower_email_id', func.lower(email), 'id'),
+        Index('ix_users_sort_first_name_id', name_sort_key(first_name), 'id'),
+        Index('ix_users_sort_last_name_id', name_sort_key(last_name), 'id'),
+    )
+
     @property
     def is_admin(self):
         return self.role == 'admin'
@@ -46,7 +85,10 @@ class ProfilePicture(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), unique=True, nullable=False)
-    image_data = Column(LargeBinary, nullable=False)
+    # Blob-Spalten sind deferred: werden nur geladen, wenn explizit darauf zugegriffen wird
+    # Altbestand: Bilddaten in der DB. Neue Bilder liegen im Blob Store (storage_key)
+    image_data = deferred(Column(LargeBinary, nullable=True))
+    storage_key = Column(String(64), nullable=True, index=True)  # SHA-256 im Blob Store
     content_type = Column(String(50), default='image/jpeg')
     uploaded_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -73,6 +115,19 @@ class Project(Base):
     # Relationships
     creator = relationship("Users", foreign_keys=[created_by])
 
+    # Indizes für Keyset-Pagination / Filter in GET /projects
+    __table_args__ = (
+        Index('ix_projects_status_id', 'status', 'id'),
+        Index('ix_projects_start_date_id', 'start_date', 'id'),
+        Index('ix_projects_end_date_id', 'end_date', 'id'),
+        Index('ix_projects_lower_name_id', func.lower(name), 'id'),
+        Index(
+            'ix_projects_lower_name_prefix',
+            func.lower(name).label('name_lower'),
+            postgresql_ops={'name_lower': 'text_pattern_ops'}
+        ),
+    )
+
 
 class ProjectMilestone(Base):
     __tablename__ = 'project_milestones'
@@ -89,6 +144,10 @@ class ProjectMilestone(Base):
     project = relationship("Project")
     creator = relationship("Users")
 
+    __table_args__ = (
+        Index('ix_project_milestones_project_date', 'project_id', 'milestone_date'),
+    )
+
 
 class ProjectMember(Base):
     __tablename__ = 'project_members'
@@ -100,6 +159,10 @@ class ProjectMember(Base):
     project = relationship("Project")
     user = relationship("Users")
 
+    __table_args__ = (
+        Index('ix_project_members_user_project', 'user_id', 'project_id'),
+    )
+
 
 class ProjectTodo(Base):
     __tablename__ = 'project_todos'
@@ -118,22 +181,41 @@ class ProjectTodo(Base):
     assignee = relationship("Users", foreign_keys=[assigned_to])
     creator = relationship("Users", foreign_keys=[created_by])
 
+    # Indizes für Filter/Pagination in GET /projects/{id}/todos
+    __table_args__ = (
+        Index('ix_project_todos_project_status_due', 'project_id', 'status', 'due_date'),
+        Index('ix_project_todos_assigned_due', 'assigned_to', 'due_date'),
+    )
+
 
 class ProjectImage(Base):
     __tablename__ = 'project_images'
 
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey('projects.id'), nullable=False)
-    image_data = Column(LargeBinary, nullable=False)
+    # Altbestand: Bilddaten in der DB. Neue Bilder liegen im Blob Store (storage_key)
+    image_data = deferred(Column(LargeBinary, nullable=True))
+    storage_key = Column(String(64), nullable=True, index=True)  # SHA-256 im Blob Store
     filename = Column(String(255), nullable=True)
     content_type = Column(String(50), nullable=True)
-    file_size = Column(Integer, nullable=True)
+    file_size = Column(Integer, nullable=True)  # gespeicherte Größe
+    original_size = Column(Integer, nullable=True)  # Größe des Uploads vor dem Transkodieren
     uploaded_by = Column(Integer, ForeignKey('users.id'), nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
 
     project = relationship("Project")
     uploader = relationship("Users")
 
+
+class StoredBlob(Base):
+    """Referenzzähler für Blobs im Blob Store (Projektbilder und Profilbilder teilen sich Blobs)"""
+    __tablename__ = 'stored_blobs'
+
+    key = Column(String(64), primary_key=True)  # SHA-256 = storage_key
+    size = Column(Integer, nullable=True)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
     
 class UserTodo(Base):
     __tablename__ = 'user_todos'
@@ -148,6 +230,10 @@ class UserTodo(Base):
 
     user = relationship("Users")
 
+    __table_args__ = (
+        Index('ix_user_todos_user_due', 'user_id', 'due_date'),
+    )
+
 
 class Contract(Base):
     __tablename__ = 'contracts'
@@ -167,12 +253,14 @@ class Contract(Base):
     end_date = Column(Date, nullable=False)
     terms = Column(Text, nullable=True)
     
-    pdf_content = Column(LargeBinary, nullable=True)
+    pdf_content = deferred(Column(LargeBinary, nullable=True))
+    has_pdf = column_property(pdf_content.expression.isnot(None))
+    pdf_hash = Column(String(64), nullable=True)  # SHA-256 des PDFs (ETag)
     sharepoint_url = Column(String(500), nullable=True)
     
-    signature_party_a = Column(LargeBinary, nullable=True)
+    signature_party_a = deferred(Column(LargeBinary, nullable=True))
     signature_employee_name = Column(String(255), nullable=True)
-    signature_party_b = Column(LargeBinary, nullable=True)
+    signature_party_b = deferred(Column(LargeBinary, nullable=True))
     signature_date = Column(DateTime, nullable=True)
     
     status = Column(String(50), default='draft')
@@ -198,7 +286,7 @@ class Document(Base):
     filesize = Column(Integer, nullable=False)
     
     filepath = Column(String(500), nullable=True)
-    filedata = Column(LargeBinary, nullable=True)
+    filedata = deferred(Column(LargeBinary, nullable=True))
     
     uploaded_by = Column(Integer, ForeignKey('users.id'), nullable=False)
     uploaded_at = Column(DateTime, default=datetime.utcnow)
@@ -5,20 +5,13 @@ from pydantic import BaseModel, EmailStr
 import pyotp, qrcode, time
 from fastapi.responses import StreamingResponse
 from io import BytesIO
-from database import SessionLocal
+from database import get_db
 import models
-from utils.security import pwd_context, generate_2fa_secret, build_otpauth_url, generate_reset_code
+from utils.security import hash_password, verify_password, generate_2fa_secret, build_otpauth_url, generate_reset_code
 from email_service import send_password_reset_email
 
 router = APIRouter(tags=["Authentication"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class TwoFASetupRequest(BaseModel):
     email: EmailStr
 
@@ -51,7 +44,7 @@ async def login(email: str = Form(...), password: str = Form(...), db: Session =
     user = db.query(models.Users).filter(models.Users.email == email).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    if not pwd_context.verify(password, user.password):
+    if not await verify_password(password, user.password):
         raise HTTPException(status_code=400, detail="Incorrect password")
     
     if user.twofa_enabled:
@@ -160,7 +153,7 @@ async def reset_password(data: ResetPasswordRequest, db: Session = Depends(get_d
     if user.reset_code != data.code:
         raise HTTPException(status_code=400, detail="Invalid reset code")
     
-    user.password = pwd_context.hash(data.new_password)
+    user.password = await hash_password(data.new_password)
     user.reset_code = None
     user.reset_code_expires = None
     db.commit()
@@ -171,15 +164,19 @@ async def change_password(data: ChangePasswordRequest, db: Session = Depends(get
     user = db.query(models.Users).filter(models.Users.email == data.email).first()
     if not user:
         raise HTTPException(status_code=404, detail="Profil nicht gefunden")
-    if not pwd_context.verify(data.current_password, user.password):
+    if not await verify_password(data.current_password, user.password):
         raise HTTPException(status_code=400, detail="Aktuelles Passwort ist falsch")
     if data.current_password == data.new_password:
         raise HTTPException(status_code=400, detail="Neues Passwort darf nicht dem alten entsprechen")
     
     try:
-        user.password = pwd_context.hash(data.new_password)
+        user.password = await hash_password(data.new_password)
         db.commit()
         return {"status": "ok", "message": "Passwort wurde erfolgreich geändert"}
+    except HTTPException:
+        # 503 bei ausgelastetem Passwort-Pool nicht in einen 500 umwandeln
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error changing password: {str(e)}")
@@ -0,0 +1,74 @@
+"""Calendar Routes - Termine eines Zeitraums nach Tagen gruppiert"""
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session
+from datetime import date
+from database import get_db
+import models
+import Rbac
+from utils.helpers import get_current_user
+from routes.user_todos import query_user_tasks
+
+router = APIRouter(tags=["Calendar"])
+
+# Maximale Länge des abgefragten Zeitraums in Tagen
+MAX_RANGE_DAYS = 366
+
+@router.get("/calendar")
+async def get_calendar(
+    user_id: int,
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    user: models.Users = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Gibt alle Termine des Users im Zeitraum from..to (inklusive) nach Tag gruppiert zurück:
+    - persönliche TODOs
+    - zugewiesene Projekt-TODOs
+    - Meilensteine der sichtbaren Projekte
+
+    Returns:
+    - days: {"YYYY-MM-DD": [Einträge]} nur für Tage mit Einträgen
+    """
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (date_to - date_from).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range must not exceed {MAX_RANGE_DAYS} days")
+
+    try:
+        items = query_user_tasks(db, user, date_from, date_to)
+
+        visible = Rbac.get_visible_project_ids(db, user)
+        if visible is None or visible:
+            milestone_query = db.query(models.ProjectMilestone, models.Project.name).join(
+                models.Project, models.Project.id == models.ProjectMilestone.project_id
+            ).filter(
+                models.ProjectMilestone.milestone_date >= date_from,
+                models.ProjectMilestone.milestone_date <= date_to
+            )
+            if visible is not None:
+                milestone_query = milestone_query.filter(models.ProjectMilestone.project_id.in_(visible))
+            items += [{
+                "id": m.id,
+                "title": m.title,
+                "description": m.description,
+                "status": m.status,
+                "due_date": str(m.milestone_date),
+                "source": "milestone",
+                "project_id": m.project_id,
+                "project_name": project_name
+            } for m, project_name in milestone_query.order_by(models.ProjectMilestone.milestone_date).all()]
+
+        days = {}
+        for item in sorted(items, key=lambda i: (i["due_date"], i["source"], i["id"])):
+            days.setdefault(item["due_date"], []).append(item)
+
+        return {
+            "status": "ok",
+            "from": str(date_from),
+            "to": str(date_to),
+            "days": days,
+            "total": len(items)
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading calendar: {str(e)}")
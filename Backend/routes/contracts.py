@@ -1,29 +1,24 @@
 # Backend/routes/contracts.py
 
 """Contract Routes - PDF Generation & Management"""
-from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi import APIRouter, HTTPException, Depends, Response, Header
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, date
 from io import BytesIO
 import base64
+import hashlib
 
-from database import SessionLocal
+from database import get_db
 import models
 import Rbac
-from utils.helpers import get_user
+from utils.helpers import get_current_user
 from utils.pdf_generator import generate_contract_pdf
+from utils.streaming import make_etag, etag_matches, cache_headers, not_modified
 
 router = APIRouter(tags=["Contracts"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 
 class ContractCreate(BaseModel):
     project_id: int
@@ -47,12 +42,12 @@ class ContractSignature(BaseModel):
 async def create_contract(
     data: ContractCreate, 
     user_id: int, 
+    user: models.Users = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Erstellt einen neuen Vertrag (ohne Unterschriften)
     """
-    user = get_user(user_id, db)
     
     # Nur Admins können Verträge erstellen
     if not Rbac.can_manage_project_members(user):
@@ -112,12 +107,12 @@ async def sign_contract(
     contract_id: int,
     data: ContractSignature,
     user_id: int,
+    user: models.Users = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Fügt Unterschriften hinzu und generiert finales PDF
     """
-    user = get_user(user_id, db)
     
     contract = db.query(models.Contract).filter(
         models.Contract.id == contract_id
@@ -141,6 +136,7 @@ async def sign_contract(
         # Generiere PDF mit Unterschriften
         pdf_bytes = generate_contract_pdf(contract)
         contract.pdf_content = pdf_bytes
+        contract.pdf_hash = hashlib.sha256(pdf_bytes).hexdigest()
         
         db.commit()
         db.refresh(contract)
@@ -163,12 +159,14 @@ async def sign_contract(
 async def download_contract(
     contract_id: int,
     user_id: int,
+    if_none_match: Optional[str] = Header(None),
+    user: models.Users = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Download des fertigen PDFs
+    Download des fertigen PDFs.
+    ETag = SHA-256 des PDFs; bei passendem If-None-Match kommt 304, ohne das PDF zu laden.
     """
-    user = get_user(user_id, db)
     
     contract = db.query(models.Contract).filter(
         models.Contract.id == contract_id
@@ -177,7 +175,7 @@ async def download_contract(
     if not contract:
         raise HTTPException(status_code=404, detail="Contract not found")
     
-    if not contract.pdf_content:
+    if not contract.has_pdf:
         raise HTTPException(status_code=404, detail="PDF not yet generated")
     
     # Check permissions
@@ -187,13 +185,21 @@ async def download_contract(
             detail="You don't have access to this contract"
         )
     
+    # PDFs von vor Einführung des Hash haben bis zu migrate_contract_hashes.py keinen ETag
+    headers = {}
+    if contract.pdf_hash:
+        headers = cache_headers(make_etag(contract.pdf_hash), private=True)
+        if etag_matches(if_none_match, headers["ETag"]):
+            return not_modified(headers)
+    
     filename = f"contract_{contract.id}_{contract.title.replace(' ', '_')}.pdf"
     
     return Response(
         content=contract.pdf_content,
         media_type="application/pdf",
         headers={
-            "Content-Disposition": f"attachment; filename={filename}"
+            "Content-Disposition": f"attachment; filename={filename}",
+            **headers
         }
     )
 
@@ -202,12 +208,12 @@ async def download_contract(
 async def get_project_contracts(
     project_id: int,
     user_id: int,
+    user: models.Users = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Gibt alle Verträge eines Projekts zurück
     """
-    user = get_user(user_id, db)
     
     if not Rbac.can_view_project(db, user, project_id):
         raise HTTPException(
@@ -232,12 +238,12 @@ async def get_project_contracts(
 async def delete_contract(
     contract_id: int,
     user_id: int,
+    user: models.Users = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
     Löscht einen Vertrag (nur Admins)
     """
-    user = get_user(user_id, db)
     
     if not Rbac.can_manage_project_members(user):
         raise HTTPException(
@@ -281,7 +287,7 @@ def format_contract_response(contract):
         "end_date": str(contract.end_date) if contract.end_date else None,
         "terms": contract.terms,
         "status": contract.status,
-        "has_pdf": contract.pdf_content is not None,
+        "has_pdf": contract.has_pdf,
         "signature_employee_name": contract.signature_employee_name,
         "signature_date": contract.signature_date.isoformat() if contract.signature_date else None,
         "created_at": contract.created_at.isoformat() if contract.created_at else None
@@ -0,0 +1,132 @@
+"""Dashboard Routes - aggregierte Übersicht in einem Request"""
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from database import get_db
+import models
+from utils.helpers import get_current_user, format_projects_response
+
+router = APIRouter(tags=["Dashboard"])
+
+@router.get("/dashboard")
+async def get_dashboard(
+    user_id: int,
+    days: int = Query(14, ge=1, le=365),
+    user: models.Users = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Liefert alles für Dashboard / Projektübersicht in einer Antwort:
+    - sichtbare Projekte inkl. Creator und Member-Anzahl
+    - TODO-Anzahl pro Status und Projekt
+    - Mitglieder pro Projekt
+    - anstehende Deadlines (TODOs, Meilensteine, Projektende) der nächsten `days` Tage
+
+    Die Anzahl der SQL-Queries ist unabhängig von der Anzahl der Projekte (7).
+    """
+
+    try:
+        query = db.query(models.Project)
+        if not user.is_admin:
+            query = query.join(
+                models.ProjectMember, models.Project.id == models.ProjectMember.project_id
+            ).filter(models.ProjectMember.user_id == user_id)
+        projects = query.order_by(models.Project.id.desc()).all()
+        project_ids = [p.id for p in projects]
+        project_names = {p.id: p.name for p in projects}
+
+        today = date.today()
+        horizon = today + timedelta(days=days)
+
+        todo_counts = {pid: {"todo": 0, "in-progress": 0, "completed": 0, "total": 0} for pid in project_ids}
+        members = {pid: [] for pid in project_ids}
+        deadlines = []
+
+        if project_ids:
+            rows = db.query(
+                models.ProjectTodo.project_id, models.ProjectTodo.status, func.count(models.ProjectTodo.id)
+            ).filter(
+                models.ProjectTodo.project_id.in_(project_ids)
+            ).group_by(models.ProjectTodo.project_id, models.ProjectTodo.status).all()
+            for project_id, status, count in rows:
+                counts = todo_counts[project_id]
+                counts[status] = counts.get(status, 0) + count
+                counts["total"] += count
+
+            rows = db.query(
+                models.ProjectMember.project_id, models.Users.id, models.Users.email,
+                models.Users.first_name, models.Users.last_name
+            ).join(
+                models.Users, models.Users.id == models.ProjectMember.user_id
+            ).filter(
+                models.ProjectMember.project_id.in_(project_ids)
+            ).order_by(models.ProjectMember.project_id, models.ProjectMember.id).all()
+            for project_id, member_id, email, first_name, last_name in rows:
+                members[project_id].append({
+                    "user_id": member_id,
+                    "user_email": email,
+                    "user_name": f"{first_name or ''} {last_name or ''}".strip() or None
+                })
+
+            todos = db.query(models.ProjectTodo).filter(
+                models.ProjectTodo.project_id.in_(project_ids),
+                models.ProjectTodo.status != "completed",
+                models.ProjectTodo.due_date >= today,
+                models.ProjectTodo.due_date <= horizon
+            ).all()
+            deadlines += [{
+                "type": "todo",
+                "id": t.id,
+                "project_id": t.project_id,
+                "project_name": project_names.get(t.project_id),
+                "title": t.title,
+                "date": str(t.due_date),
+                "status": t.status,
+                "priority": t.priority,
+                "assigned_to": t.assigned_to
+            } for t in todos]
+
+            milestones = db.query(models.ProjectMilestone).filter(
+                models.ProjectMilestone.project_id.in_(project_ids),
+                models.ProjectMilestone.status != "completed",
+                models.ProjectMilestone.milestone_date >= today,
+                models.ProjectMilestone.milestone_date <= horizon
+            ).all()
+            deadlines += [{
+                "type": "milestone",
+                "id": m.id,
+                "project_id": m.project_id,
+                "project_name": project_names.get(m.project_id),
+                "title": m.title,
+                "date": str(m.milestone_date),
+                "status": m.status
+            } for m in milestones]
+
+        deadlines += [{
+            "type": "project_end",
+            "id": p.id,
+            "project_id": p.id,
+            "project_name": p.name,
+            "title": p.name,
+            "date": str(p.end_date),
+            "status": p.status
+        } for p in projects if p.end_date and today <= p.end_date <= horizon and p.status != "completed"]
+        deadlines.sort(key=lambda d: (d["date"], d["type"], d["id"]))
+
+        # Member-Anzahl aus den bereits geladenen Mitgliedern, keine eigene Query
+        projects_formatted = format_projects_response(
+            projects, db, {pid: len(project_members) for pid, project_members in members.items()}
+        )
+        for project in projects_formatted:
+            project["todo_counts"] = todo_counts[project["id"]]
+            project["members"] = members[project["id"]]
+
+        return {
+            "status": "ok",
+            "projects": projects_formatted,
+            "total": len(projects_formatted),
+            "upcoming_deadlines": deadlines
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading dashboard: {str(e)}")
@@ -1,20 +1,53 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from typing import List, Optional
 import base64
+import os
+import secrets
+from urllib.parse import quote
 from datetime import datetime
-from database import SessionLocal
+from database import get_db, SessionLocal
+from utils.streaming import (
+    CHUNK_SIZE, blob_response, db_blob_response, content_version, make_etag, etag_matches, cache_headers, not_modified
+)
+from utils.blob_store import get_blob_store
+from utils.images import (
+    THUMBNAIL_MEDIA_TYPE, TRANSCODE_EXTENSIONS, thumbnail_variant, image_version, validate_size, generate_thumbnails, ensure_thumbnail, ensure_thumbnails,
+    save_image_upload, store_image_chunks, transcode_image, UploadTooLarge, UnsupportedImageType
+)
+from utils import upload_sessions
+from utils.blob_refs import detach_blob, release_blob, unpin_blob
 
 
 from models import ProjectImage, Project
 
 router = APIRouter(tags=["Project Images"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_BATCH_IMAGES = 100
+
+
+class UploadSessionRequest(BaseModel):
+    filename: Optional[str] = None
+    size: int = Field(..., gt=0, le=MAX_IMAGE_SIZE)
+    chunk_size: int = Field(
+        upload_sessions.DEFAULT_CHUNK_SIZE,
+        ge=upload_sessions.MIN_CHUNK_SIZE,
+        le=upload_sessions.MAX_CHUNK_SIZE
+    )
+
+
+def read_image_data(image: ProjectImage, db: Session) -> Optional[bytes]:
+    """Bilddaten aus dem Blob Store bzw. (Altbestand) aus der DB"""
+    if image.storage_key:
+        store = get_blob_store()
+        return store.read(image.storage_key) if store.exists(image.storage_key) else None
+    return db.query(ProjectImage.image_data).filter(ProjectImage.id == image.id).scalar()
+
 
 # ✅ LAZY LOADING: Nur Metadaten zurückgeben (kein Bild-Inhalt)
 @router.get("/projects/{project_id}/images")
@@ -22,12 +55,21 @@ def get_project_images_metadata(project_id: int, db: Session = Depends(get_db)):
     """
     Gibt nur Metadaten der Projektbilder zurück (id, filename, uploaded_at).
     Kein Base64 - Bilder werden über den Einzelbild-Endpoint lazy geladen.
+    Es werden nur die Metadaten-Spalten selektiert, image_data bleibt in der DB.
     """
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = db.query(Project.id).filter(Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    images = db.query(ProjectImage).filter(ProjectImage.project_id == project_id).all()
+    images = db.query(
+        ProjectImage.id,
+        ProjectImage.filename,
+        ProjectImage.content_type,
+        ProjectImage.file_size,
+        ProjectImage.original_size,
+        ProjectImage.storage_key,
+        ProjectImage.uploaded_at
+    ).filter(ProjectImage.project_id == project_id).order_by(ProjectImage.id).all()
 
     return {
         "project_id": project_id,
@@ -35,22 +77,158 @@ def get_project_images_metadata(project_id: int, db: Session = Depends(get_db)):
             {
                 "id": img.id,
                 "filename": img.filename,
-                "content_type": getattr(img, "content_type", "image/jpeg"),
-                "file_size": getattr(img, "file_size", None),
+                "content_type": img.content_type or "image/jpeg",
+                "file_size": img.file_size,
+                "original_size": img.original_size,
                 "uploaded_at": img.uploaded_at.isoformat() if img.uploaded_at else None,
+                "version": content_version(img.storage_key),
+                "raw_url": _raw_url(project_id, img.id, img.storage_key),
+                "thumbnail_url": _raw_url(project_id, img.id, img.storage_key, "thumb"),
+                "medium_url": _raw_url(project_id, img.id, img.storage_key, "medium"),
             }
             for img in images
         ]
     }
 
 
+def _raw_url(project_id: int, image_id: int, storage_key: Optional[str], size: Optional[str] = None) -> str:
+    """URL der Binärdaten; mit Content-Version (?v=) dauerhaft cachebar"""
+    params = []
+    if size:
+        params.append(f"size={size}")
+    if storage_key:
+        params.append(f"v={image_version(storage_key, size)}")
+    url = f"/projects/{project_id}/images/{image_id}/raw"
+    return f"{url}?{'&'.join(params)}" if params else url
+
+
+# Mehrere Bilder in einem Request (multipart/mixed, gestreamt)
+@router.get("/projects/{project_id}/images/batch")
+def get_project_images_batch(
+    project_id: int,
+    ids: List[int] = Query(..., description="Bild-IDs, z.B. ?ids=1&ids=2"),
+    size: Optional[str] = Query(None, description="original, thumb oder medium"),
+    db: Session = Depends(get_db)
+):
+    """
+    Liefert mehrere Projektbilder (bzw. Thumbnails) als eine multipart/mixed
+    Antwort, z.B. für eine komplette Galerie in einem Round Trip.
+
+    Jeder Part enthält die Binärdaten mit Content-Type, ETag, X-Image-Id und
+    Dateiname, in der angefragten Reihenfolge. Die Dateien werden blockweise
+    aus dem Blob Store gestreamt; fehlende Thumbnails werden parallel erzeugt.
+    Noch nicht migrierte Bilder (image_data in der DB) kommen als Original
+    ohne ETag. Nicht gefundene IDs stehen im Header X-Missing-Image-Ids.
+    """
+    size = validate_size(size)
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_IMAGES:
+        raise HTTPException(status_code=400, detail=f"Too many images. Maximum is {MAX_BATCH_IMAGES}.")
+
+    images = {
+        image.id: image
+        for image in db.query(ProjectImage).filter(
+            ProjectImage.project_id == project_id,
+            ProjectImage.id.in_(ids)
+        ).all()
+    }
+
+    store = get_blob_store()
+    keys = {
+        image_id: image.storage_key for image_id, image in images.items()
+        if image.storage_key and store.exists(image.storage_key)
+    }
+    thumbnails = ensure_thumbnails(store, keys.values(), size) if size else set()
+
+    # Altbestand (noch nicht migriert): Original direkt aus der DB, ohne Thumbnail
+    legacy_ids = [image_id for image_id, image in images.items() if not image.storage_key]
+    legacy_sizes = dict(db.query(ProjectImage.id, func.length(ProjectImage.image_data)).filter(
+        ProjectImage.id.in_(legacy_ids),
+        ProjectImage.image_data.isnot(None)
+    ).all()) if legacy_ids else {}
+
+    parts = []
+    for image_id in ids:
+        image = images.get(image_id)
+        if image_id in keys:
+            key = keys[image_id]
+            variant = thumbnail_variant(size) if key in thumbnails else None
+            length = store.size(key, variant)
+            part_headers = {
+                "Content-Type": THUMBNAIL_MEDIA_TYPE if variant else image.content_type or "image/jpeg",
+                "ETag": make_etag(key, variant),
+            }
+        elif legacy_sizes.get(image_id):
+            key, variant, length = None, None, legacy_sizes[image_id]
+            part_headers = {"Content-Type": image.content_type or "image/jpeg"}
+        else:
+            continue
+        parts.append({
+            "image_id": image_id,
+            "key": key,
+            "variant": variant,
+            "length": length,
+            "headers": {
+                **part_headers,
+                "Content-Length": str(length),
+                "Content-Disposition": f"inline; filename*=UTF-8''{quote(image.filename or f'image_{image_id}')}",
+                "X-Image-Id": str(image_id),
+            },
+        })
+    found = {part["image_id"] for part in parts}
+    missing = [str(image_id) for image_id in ids if image_id not in found]
+
+    boundary = secrets.token_hex(16)
+
+    def iter_parts():
+        # Eigene Session für Altbestand aus der DB, unabhängig vom Request-Lebenszyklus
+        stream_db = SessionLocal() if any(part["key"] is None for part in parts) else None
+        try:
+            for part in parts:
+                head = f"--{boundary}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in part["headers"].items()) + "\r\n"
+                yield head.encode("utf-8")
+                offset = 0
+                while offset < part["length"]:
+                    if part["key"]:
+                        chunk = store.read_range(part["key"], offset, CHUNK_SIZE, part["variant"])
+                    else:
+                        chunk = stream_db.query(
+                            func.substr(ProjectImage.image_data, offset + 1, CHUNK_SIZE)
+                        ).filter(ProjectImage.id == part["image_id"]).scalar()
+                    if not chunk:
+                        break
+                    yield chunk
+                    offset += len(chunk)
+                yield b"\r\n"
+            yield f"--{boundary}--\r\n".encode("utf-8")
+        finally:
+            if stream_db is not None:
+                stream_db.close()
+
+    return StreamingResponse(
+        iter_parts(),
+        media_type=f"multipart/mixed; boundary={boundary}",
+        headers={"X-Missing-Image-Ids": ",".join(missing), "Cache-Control": "no-cache"}
+    )
+
+
 # ✅ LAZY LOADING: Einzelnes Bild als Base64 zurückgeben
 @router.get("/projects/{project_id}/images/{image_id}")
-def get_project_image(project_id: int, image_id: int, db: Session = Depends(get_db)):
+def get_project_image(
+    project_id: int,
+    image_id: int,
+    response: Response,
+    size: Optional[str] = Query(None, description="original, thumb oder medium"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
     """
     Gibt ein einzelnes Projektbild als Base64 zurück.
     Wird vom Frontend lazy aufgerufen, nachdem die Metadaten geladen wurden.
+    Mit `size` wird statt des Originals ein Thumbnail (WebP) geliefert.
+    Bilder im Blob Store haben einen ETag; bei passendem If-None-Match kommt 304.
     """
+    size = validate_size(size)
     image = db.query(ProjectImage).filter(
         ProjectImage.id == image_id,
         ProjectImage.project_id == project_id
@@ -59,11 +237,20 @@ def get_project_image(project_id: int, image_id: int, db: Session = Depends(get_
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    if not image.image_data:
+    if image.storage_key:
+        etag = make_etag(image.storage_key, f"{thumbnail_variant(size)}-json" if size else "json")
+        response.headers.update(cache_headers(etag))
+        if etag_matches(if_none_match, etag):
+            return not_modified(cache_headers(etag))
+
+    store = get_blob_store()
+    thumbnail = size and image.storage_key and ensure_thumbnail(store, image.storage_key, size)
+    data = store.read(image.storage_key, thumbnail_variant(size)) if thumbnail else read_image_data(image, db)
+    if not data:
         raise HTTPException(status_code=404, detail="Image data not found")
 
-    image_base64 = base64.b64encode(image.image_data).decode("utf-8")
-    content_type = getattr(image, "content_type", "image/jpeg") or "image/jpeg"
+    image_base64 = base64.b64encode(data).decode("utf-8")
+    content_type = THUMBNAIL_MEDIA_TYPE if thumbnail else getattr(image, "content_type", "image/jpeg") or "image/jpeg"
 
     return {
         "id": image.id,
@@ -75,10 +262,80 @@ def get_project_image(project_id: int, image_id: int, db: Session = Depends(get_
     }
 
 
+# Einzelnes Bild als Binärdaten streamen (mit Range Support)
+@router.get("/projects/{project_id}/images/{image_id}/raw")
+def get_project_image_raw(
+    project_id: int,
+    image_id: int,
+    size: Optional[str] = Query(None, description="original, thumb oder medium"),
+    v: Optional[str] = Query(None, description="Content-Version aus der Bildliste"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Liefert die Bilddaten direkt als Binärdaten mit passendem Content-Type.
+    Bilder im Blob Store werden direkt aus dem Dateisystem ausgeliefert,
+    Altbestand in der DB blockweise per substr() gelesen - das Bild liegt
+    dabei nie komplett im Speicher. Unterstützt HTTP Range Requests.
+
+    Mit `size` wird ein Thumbnail (WebP) geliefert; fehlt es, wird es beim ersten
+    Abruf erzeugt. Noch nicht migrierte Bilder aus der DB kommen immer als Original.
+
+    Caching: ETag = Content-Hash, If-None-Match wird vor dem Lesen der Datei
+    geprüft (304). Mit passender Version `v` ist die URL immutable.
+    """
+    size = validate_size(size)
+    meta = db.query(
+        ProjectImage.id,
+        ProjectImage.filename,
+        ProjectImage.content_type,
+        ProjectImage.storage_key,
+        func.length(ProjectImage.image_data).label("size")
+    ).filter(
+        ProjectImage.id == image_id,
+        ProjectImage.project_id == project_id
+    ).first()
+
+    if not meta:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    headers = {"Content-Disposition": f"inline; filename*=UTF-8''{quote(meta.filename or f'image_{image_id}')}"}
+    storage_key = meta.storage_key
+
+    if storage_key:
+        immutable = v is not None and v == image_version(storage_key, size)
+        etag = make_etag(storage_key, thumbnail_variant(size))
+        if etag_matches(if_none_match, etag):
+            return not_modified(cache_headers(etag, immutable))
+
+        store = get_blob_store()
+        if not store.exists(storage_key):
+            raise HTTPException(status_code=404, detail="Image data not found")
+        if size and ensure_thumbnail(store, storage_key, size):
+            headers.update(cache_headers(etag, immutable))
+            return blob_response(store, storage_key, THUMBNAIL_MEDIA_TYPE, range_header, headers, variant=thumbnail_variant(size))
+        headers.update(cache_headers(make_etag(storage_key), immutable and not size))
+        return blob_response(store, storage_key, meta.content_type or "image/jpeg", range_header, headers)
+
+    if not meta.size:
+        raise HTTPException(status_code=404, detail="Image data not found")
+
+    return db_blob_response(
+        ProjectImage.image_data,
+        ProjectImage.id == image_id,
+        meta.size,
+        meta.content_type or "image/jpeg",
+        range_header,
+        headers
+    )
+
+
 # Upload: Bild zu Projekt hinzufügen
 @router.post("/projects/{project_id}/images")
 async def upload_project_image(
     project_id: int,
+    user_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -86,31 +343,64 @@ async def upload_project_image(
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
-    if file.content_type not in allowed_types:
+    # Upload blockweise in den Blob Store streamen, die DB speichert nur den Key
+    try:
+        storage_key, file_size, content_type = await save_image_upload(file, MAX_IMAGE_SIZE, db)
+    except UnsupportedImageType:
         raise HTTPException(status_code=400, detail="Invalid file type. Only images are allowed.")
+    except UploadTooLarge:
+        raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB.")
 
-    contents = await file.read()
+    return await create_image(db, project_id, user_id, file.filename, storage_key, file_size, content_type)
 
-    # Max 10MB
-    if len(contents) > 10 * 1024 * 1024:
-        raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB.")
 
-    new_image = ProjectImage(
-        project_id=project_id,
-        image_data=contents,
-        filename=file.filename,
-        uploaded_at=datetime.now(),
-    )
+async def create_image(db: Session, project_id: int, user_id: int, filename: Optional[str],
+                       storage_key: str, file_size: int, content_type: str) -> dict:
+    """
+    Legt den DB-Eintrag für ein im Blob Store abgelegtes (gepinntes) Bild an.
+    Vorher wird es ggf. transkodiert (IMAGE_TRANSCODE_FORMAT) und die
+    Thumbnails werden erzeugt; ein ersetztes Original wird freigegeben.
+    Die neue Zeile übernimmt die Referenz aus pin_blob(), bei Fehlern wird sie freigegeben.
+    """
+    store = get_blob_store()
+    original_key, original_size = storage_key, file_size
+    try:
+        storage_key, file_size, content_type = await transcode_image(
+            store, storage_key, file_size, content_type, db
+        )
+    except BaseException:
+        await run_in_threadpool(unpin_blob, db, original_key)
+        raise
+    if storage_key != original_key:
+        await run_in_threadpool(unpin_blob, db, original_key)
+        if filename:
+            filename = os.path.splitext(filename)[0] + TRANSCODE_EXTENSIONS[content_type]
+
+    try:
+        await generate_thumbnails(store, storage_key)
 
-    # Optionale Felder setzen, falls im Modell vorhanden
-    if hasattr(new_image, "content_type"):
-        new_image.content_type = file.content_type
-    if hasattr(new_image, "file_size"):
-        new_image.file_size = len(contents)
+        new_image = ProjectImage(
+            project_id=project_id,
+            storage_key=storage_key,
+            filename=filename,
+            uploaded_by=user_id,
+            uploaded_at=datetime.now(),
+        )
 
-    db.add(new_image)
-    db.commit()
+        # Optionale Felder setzen, falls im Modell vorhanden
+        if hasattr(new_image, "content_type"):
+            new_image.content_type = content_type
+        if hasattr(new_image, "file_size"):
+            new_image.file_size = file_size
+        if hasattr(new_image, "original_size"):
+            new_image.original_size = original_size
+
+        db.add(new_image)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        await run_in_threadpool(unpin_blob, db, storage_key)
+        raise
     db.refresh(new_image)
 
     return {
@@ -121,6 +411,97 @@ async def upload_project_image(
     }
 
 
+# Resumable Upload: Session anlegen
+@router.post("/projects/{project_id}/images/uploads")
+def create_upload_session(
+    project_id: int,
+    user_id: int,
+    request: UploadSessionRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Startet einen Resumable Upload. Danach die Chunks per
+    PUT .../uploads/{upload_id}/chunks/{index} senden (beliebige Reihenfolge,
+    Wiederholung erlaubt) und mit POST .../uploads/{upload_id}/complete abschließen.
+    """
+    project = db.query(Project.id).filter(Project.id == project_id).first()
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    session = upload_sessions.create_session(
+        project_id, user_id, request.filename, request.size, request.chunk_size
+    )
+    return {"status": "ok", **_session_response(session)}
+
+
+# Resumable Upload: Status (welche Chunks fehlen noch)
+@router.get("/projects/{project_id}/images/uploads/{upload_id}")
+def get_upload_session(project_id: int, upload_id: str):
+    session = upload_sessions.get_session(upload_id, project_id)
+    return {"status": "ok", **_session_response(session)}
+
+
+# Resumable Upload: einzelnen Chunk hochladen (Body = Rohdaten des Chunks)
+@router.put("/projects/{project_id}/images/uploads/{upload_id}/chunks/{index}")
+async def put_upload_chunk(project_id: int, upload_id: str, index: int, request: Request):
+    session = await run_in_threadpool(upload_sessions.get_session, upload_id, project_id)
+    await upload_sessions.write_chunk(session, index, request.stream())
+    missing = await run_in_threadpool(upload_sessions.missing_chunks, session)
+    return {"status": "ok", "index": index, "missing_chunks": missing}
+
+
+# Resumable Upload: Chunks zusammensetzen und Bild anlegen
+@router.post("/projects/{project_id}/images/uploads/{upload_id}/complete")
+async def complete_upload_session(project_id: int, upload_id: str, db: Session = Depends(get_db)):
+    session = await run_in_threadpool(upload_sessions.get_session, upload_id, project_id)
+    missing = await run_in_threadpool(upload_sessions.missing_chunks, session)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Upload incomplete. Missing chunks: {missing}")
+
+    # Nur ein Abschluss pro Session: weitere gleichzeitige Aufrufe bekommen 409
+    session = await run_in_threadpool(upload_sessions.claim_session, session)
+    try:
+        storage_key, file_size, content_type = await run_in_threadpool(
+            store_image_chunks, upload_sessions.iter_session_data(session), MAX_IMAGE_SIZE, db
+        )
+    except (UnsupportedImageType, UploadTooLarge) as e:
+        await run_in_threadpool(upload_sessions.release_session, session)
+        if isinstance(e, UploadTooLarge):
+            raise HTTPException(status_code=400, detail="File too large. Maximum size is 10MB.")
+        raise HTTPException(status_code=400, detail="Invalid file type. Only images are allowed.")
+    except BaseException:
+        await run_in_threadpool(upload_sessions.release_session, session)
+        raise
+    try:
+        await run_in_threadpool(upload_sessions.finish_session, session)
+    except BaseException:
+        await run_in_threadpool(unpin_blob, db, storage_key)
+        raise
+
+    return await create_image(
+        db, project_id, session["user_id"], session["filename"], storage_key, file_size, content_type
+    )
+
+
+# Resumable Upload abbrechen
+@router.delete("/projects/{project_id}/images/uploads/{upload_id}")
+def delete_upload_session(project_id: int, upload_id: str):
+    upload_sessions.get_session(upload_id, project_id)
+    upload_sessions.delete_session(upload_id)
+    return {"status": "ok", "message": "Upload session deleted"}
+
+
+def _session_response(session: dict) -> dict:
+    return {
+        "upload_id": session["upload_id"],
+        "size": session["size"],
+        "chunk_size": session["chunk_size"],
+        "total_chunks": session["total_chunks"],
+        "missing_chunks": upload_sessions.missing_chunks(session),
+        "expires_at": datetime.fromtimestamp(session["expires_at"]).isoformat(),
+    }
+
+
 # Bild löschen
 @router.delete("/projects/{project_id}/images/{image_id}")
 def delete_project_image(project_id: int, image_id: int, db: Session = Depends(get_db)):
@@ -132,7 +513,12 @@ def delete_project_image(project_id: int, image_id: int, db: Session = Depends(g
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
 
+    storage_key = image.storage_key
     db.delete(image)
+    detach_blob(db, storage_key)
     db.commit()
 
+    # Blob nur löschen, wenn kein anderes Bild denselben Inhalt referenziert
+    release_blob(storage_key, db)
+
     return {"status": "ok", "message": "Image deleted successfully"}
\ No newline at end of file
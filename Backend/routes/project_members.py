@@ -2,26 +2,18 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from database import SessionLocal
+from database import get_db
 import models
 import Rbac
-from utils.helpers import get_user
+from utils.helpers import get_current_user, get_users, find_user
 
 router = APIRouter(tags=["Project Members"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class ProjectMemberAdd(BaseModel):
     user_id: int
 
 @router.post("/projects/{project_id}/members")
-async def add_project_member(project_id: int, data: ProjectMemberAdd, user_id: int, db: Session = Depends(get_db)):
-    admin_user = get_user(user_id, db)
+async def add_project_member(project_id: int, data: ProjectMemberAdd, user_id: int, admin_user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     if not Rbac.can_manage_project_members(admin_user):
         raise HTTPException(status_code=403, detail="Only admins can manage project members")
     
@@ -29,7 +21,7 @@ async def add_project_member(project_id: int, data: ProjectMemberAdd, user_id: i
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    target_user = db.query(models.Users).filter(models.Users.id == data.user_id).first()
+    target_user = find_user(data.user_id, db)
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -45,6 +37,7 @@ async def add_project_member(project_id: int, data: ProjectMemberAdd, user_id: i
         db.add(new_member)
         db.commit()
         db.refresh(new_member)
+        Rbac.invalidate_membership_cache(db, data.user_id)
         
         return {
             "status": "ok",
@@ -62,8 +55,7 @@ async def add_project_member(project_id: int, data: ProjectMemberAdd, user_id: i
         raise HTTPException(status_code=500, detail=f"Error adding member: {str(e)}")
 
 @router.delete("/projects/{project_id}/members/{member_user_id}")
-async def remove_project_member(project_id: int, member_user_id: int, user_id: int, db: Session = Depends(get_db)):
-    admin_user = get_user(user_id, db)
+async def remove_project_member(project_id: int, member_user_id: int, user_id: int, admin_user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     if not Rbac.can_manage_project_members(admin_user):
         raise HTTPException(status_code=403, detail="Only admins can manage project members")
     
@@ -77,6 +69,7 @@ async def remove_project_member(project_id: int, member_user_id: int, user_id: i
     try:
         db.delete(member)
         db.commit()
+        Rbac.invalidate_membership_cache(db, member_user_id)
         return {
             "status": "ok",
             "message": "Member removed from project successfully",
@@ -88,8 +81,7 @@ async def remove_project_member(project_id: int, member_user_id: int, user_id: i
         raise HTTPException(status_code=500, detail=f"Error removing member: {str(e)}")
 
 @router.get("/projects/{project_id}/members")
-async def get_project_members(project_id: int, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def get_project_members(project_id: int, user_id: int, user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -97,9 +89,10 @@ async def get_project_members(project_id: int, user_id: int, db: Session = Depen
         raise HTTPException(status_code=403, detail="You don't have access to this project")
     
     members = db.query(models.ProjectMember).filter(models.ProjectMember.project_id == project_id).all()
+    member_users = get_users([m.user_id for m in members], db)
     members_list = []
     for member in members:
-        member_user = db.query(models.Users).filter(models.Users.id == member.user_id).first()
+        member_user = member_users.get(member.user_id)
         members_list.append({
             "id": member.id,
             "project_id": member.project_id,
@@ -1,23 +1,16 @@
 """Project Milestones Routes"""
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
-from database import SessionLocal
+from typing import Optional, List
+from datetime import datetime, date
+from database import get_db
 import models
 import Rbac
-from utils.helpers import get_user
+from utils.helpers import get_current_user
 
 router = APIRouter(tags=["Project Milestones"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class MilestoneCreate(BaseModel):
     title: str
     milestone_date: str  # YYYY-MM-DD
@@ -34,10 +27,10 @@ async def create_milestone(
     project_id: int, 
     data: MilestoneCreate, 
     user_id: int, 
+    user: models.Users = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Erstellt einen neuen Meilenstein für ein Projekt"""
-    user = get_user(user_id, db)
     
     # Nur Admins können Milestones erstellen
     if not Rbac.can_edit_project(db, user, project_id):
@@ -84,10 +77,10 @@ async def create_milestone(
 async def get_project_milestones(
     project_id: int, 
     user_id: int, 
+    user: models.Users = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Gibt alle Meilensteine eines Projekts zurück"""
-    user = get_user(user_id, db)
     
     if not Rbac.can_view_project(db, user, project_id):
         raise HTTPException(
@@ -107,16 +100,64 @@ async def get_project_milestones(
         "total": len(milestones_list)
     }
 
+@router.get("/milestones")
+async def get_milestones_batch(
+    user_id: int,
+    project_ids: Optional[List[int]] = Query(None),
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    user: models.Users = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Gibt die Meilensteine mehrerer Projekte in einer Query zurück (z.B. für Timeline/Gantt).
+    Ohne project_ids werden alle sichtbaren Projekte geliefert, nicht sichtbare IDs werden ignoriert.
+    """
+    query = db.query(models.ProjectMilestone)
+
+    if project_ids is not None:
+        project_ids = Rbac.filter_viewable(db, user, project_ids)
+        if not project_ids:
+            return {"status": "ok", "projects": {}, "total": 0}
+        query = query.filter(models.ProjectMilestone.project_id.in_(project_ids))
+    else:
+        visible = Rbac.get_visible_project_ids(db, user)
+        if visible is not None:
+            if not visible:
+                return {"status": "ok", "projects": {}, "total": 0}
+            query = query.filter(models.ProjectMilestone.project_id.in_(visible))
+
+    if date_from:
+        query = query.filter(models.ProjectMilestone.milestone_date >= date_from)
+    if date_to:
+        query = query.filter(models.ProjectMilestone.milestone_date <= date_to)
+
+    milestones = query.order_by(
+        models.ProjectMilestone.project_id,
+        models.ProjectMilestone.milestone_date,
+        models.ProjectMilestone.id
+    ).all()
+
+    projects = {}
+    for m in milestones:
+        projects.setdefault(str(m.project_id), []).append(format_milestone_response(m))
+
+    return {
+        "status": "ok",
+        "projects": projects,
+        "total": len(milestones)
+    }
+
 @router.put("/projects/{project_id}/milestones/{milestone_id}")
 async def update_milestone(
     project_id: int,
     milestone_id: int,
     data: MilestoneUpdate,
     user_id: int,
+    user: models.Users = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Aktualisiert einen Meilenstein"""
-    user = get_user(user_id, db)
     
     if not Rbac.can_edit_project(db, user, project_id):
         raise HTTPException(
@@ -162,10 +203,10 @@ async def delete_milestone(
     project_id: int,
     milestone_id: int,
     user_id: int,
+    user: models.Users = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Löscht einen Meilenstein"""
-    user = get_user(user_id, db)
     
     if not Rbac.can_delete_project(user):
         raise HTTPException(
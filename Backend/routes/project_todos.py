@@ -1,23 +1,17 @@
 """Project TODOs Routes - UPDATED mit Pflicht-Datum"""
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.orm import Session, joinedload
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
-from database import SessionLocal
+from datetime import datetime, date
+from database import get_db
 import models
 import Rbac
-from utils.helpers import get_user
+from utils.helpers import get_current_user
+from utils.pagination import keyset_paginate
 
 router = APIRouter(tags=["Project TODOs"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class ProjectTodoCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -34,18 +28,28 @@ class ProjectTodoUpdate(BaseModel):
     assigned_to: Optional[int] = None
     due_date: Optional[str] = None
 
-def format_todo_response(todo, db: Session):
+def query_todos_with_users(db: Session):
+    """
+    Query für ProjectTodos inkl. Assignee und Creator (LEFT JOIN),
+    damit beim Serialisieren keine User-Queries pro TODO anfallen.
+    """
+    return db.query(models.ProjectTodo).options(
+        joinedload(models.ProjectTodo.assignee),
+        joinedload(models.ProjectTodo.creator)
+    )
+
+def format_todo_response(todo):
+    """Formatiert TODO für Response (nutzt die Relationships assignee/creator)"""
     assignee = None
-    if todo.assigned_to:
-        user = db.query(models.Users).filter(models.Users.id == todo.assigned_to).first()
-        if user:
-            assignee = {
-                "id": user.id,
-                "email": user.email,
-                "name": f"{user.first_name or ''} {user.last_name or ''}".strip() or None
-            }
+    user = todo.assignee
+    if user:
+        assignee = {
+            "id": user.id,
+            "email": user.email,
+            "name": f"{user.first_name or ''} {user.last_name or ''}".strip() or None
+        }
     
-    creator = db.query(models.Users).filter(models.Users.id == todo.created_by).first()
+    creator = todo.creator
     
     return {
         "id": todo.id,
@@ -62,8 +66,7 @@ def format_todo_response(todo, db: Session):
     }
 
 @router.post("/projects/{project_id}/todos")
-async def create_project_todo(project_id: int, data: ProjectTodoCreate, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def create_project_todo(project_id: int, data: ProjectTodoCreate, user_id: int, user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
@@ -96,7 +99,7 @@ async def create_project_todo(project_id: int, data: ProjectTodoCreate, user_id:
         return {
             "status": "ok",
             "message": "TODO created successfully",
-            "todo": format_todo_response(db_todo, db)
+            "todo": format_todo_response(db_todo)
         }
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
@@ -104,32 +107,86 @@ async def create_project_todo(project_id: int, data: ProjectTodoCreate, user_id:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating TODO: {str(e)}")
 
+# Sortieroptionen für GET /projects/{id}/todos: Name -> (Sortierspalte, Cursor-Parser)
+TODO_SORT_OPTIONS = {
+    "id": (models.ProjectTodo.id, int),
+    "due_date": (models.ProjectTodo.due_date, date.fromisoformat),
+    "title": (models.ProjectTodo.title, None),
+}
+
 @router.get("/projects/{project_id}/todos")
-async def get_project_todos(project_id: int, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
-    
+async def get_project_todos(
+    project_id: int,
+    user_id: int,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    assigned_to: Optional[int] = None,
+    due_from: Optional[date] = None,
+    due_to: Optional[date] = None,
+    sort: str = "id",
+    order: str = "asc",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    user: models.Users = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Gibt die TODOs eines Projekts zurück.
+
+    - status / priority / assigned_to: Filter
+    - due_from / due_to: Fälligkeitszeitraum (inklusive)
+    - sort: id, due_date, title (mit ID als Tie-Breaker), order: asc/desc
+    - limit / cursor: Keyset-Pagination über `next_cursor`, ohne limit alle TODOs
+    """
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     if not Rbac.can_view_project(db, user, project_id):
         raise HTTPException(status_code=403, detail="You don't have access to this project")
+
+    if sort not in TODO_SORT_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Use one of: {', '.join(TODO_SORT_OPTIONS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order. Use asc or desc")
     
-    todos = db.query(models.ProjectTodo).filter(
+    query = query_todos_with_users(db).filter(
         models.ProjectTodo.project_id == project_id
-    ).all()
+    )
+    if status:
+        query = query.filter(models.ProjectTodo.status == status)
+    if priority:
+        query = query.filter(models.ProjectTodo.priority == priority)
+    if assigned_to is not None:
+        query = query.filter(models.ProjectTodo.assigned_to == assigned_to)
+    if due_from:
+        query = query.filter(models.ProjectTodo.due_date >= due_from)
+    if due_to:
+        query = query.filter(models.ProjectTodo.due_date <= due_to)
+
+    sort_column, sort_parser = TODO_SORT_OPTIONS[sort]
+    if sort == "id":
+        columns, parsers = (models.ProjectTodo.id,), [int]
+        cursor_key = lambda t: (t.id,)
+    else:
+        columns, parsers = (sort_column, models.ProjectTodo.id), [sort_parser, int]
+        cursor_key = lambda t: (getattr(t, sort), t.id)
+
+    todos, next_cursor = keyset_paginate(
+        query, columns, cursor_key,
+        cursor=cursor, limit=limit, descending=(order == "desc"), parsers=parsers
+    )
     
-    todos_formatted = [format_todo_response(t, db) for t in todos]
-    return {"status": "ok", "todos": todos_formatted, "total": len(todos_formatted)}
+    todos_formatted = [format_todo_response(t) for t in todos]
+    return {"status": "ok", "todos": todos_formatted, "total": len(todos_formatted), "next_cursor": next_cursor}
 
 @router.get("/projects/{project_id}/todos/{todo_id}")
-async def get_project_todo(project_id: int, todo_id: int, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def get_project_todo(project_id: int, todo_id: int, user_id: int, user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     
     if not Rbac.can_view_project(db, user, project_id):
         raise HTTPException(status_code=403, detail="You don't have access to this project")
     
-    todo = db.query(models.ProjectTodo).filter(
+    todo = query_todos_with_users(db).filter(
         models.ProjectTodo.id == todo_id,
         models.ProjectTodo.project_id == project_id
     ).first()
@@ -137,11 +194,10 @@ async def get_project_todo(project_id: int, todo_id: int, user_id: int, db: Sess
     if not todo:
         raise HTTPException(status_code=404, detail="TODO not found")
     
-    return {"status": "ok", "todo": format_todo_response(todo, db)}
+    return {"status": "ok", "todo": format_todo_response(todo)}
 
 @router.put("/projects/{project_id}/todos/{todo_id}")
-async def update_project_todo(project_id: int, todo_id: int, data: ProjectTodoUpdate, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def update_project_todo(project_id: int, todo_id: int, data: ProjectTodoUpdate, user_id: int, user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     
     if not Rbac.can_view_project(db, user, project_id):
         raise HTTPException(status_code=403, detail="You don't have access to this project")
@@ -174,15 +230,14 @@ async def update_project_todo(project_id: int, todo_id: int, data: ProjectTodoUp
         return {
             "status": "ok",
             "message": "TODO updated successfully",
-            "todo": format_todo_response(todo, db)
+            "todo": format_todo_response(todo)
         }
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error updating TODO: {str(e)}")
 
 @router.delete("/projects/{project_id}/todos/{todo_id}")
-async def delete_project_todo(project_id: int, todo_id: int, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def delete_project_todo(project_id: int, todo_id: int, user_id: int, user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     
     if not Rbac.can_view_project(db, user, project_id):
         raise HTTPException(status_code=403, detail="You don't have access to this project")
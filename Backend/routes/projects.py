@@ -1,24 +1,21 @@
 """Projects Routes"""
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.dialects.postgresql import ARRAY
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime, date
-from database import SessionLocal
+from database import get_db
 import models
 import Rbac
-from utils.helpers import get_user, format_project_response
+from utils.helpers import get_current_user, format_project_response, format_projects_response
+from utils.pagination import keyset_paginate
+from utils.blob_refs import detach_blob, release_blob
 
 router = APIRouter(tags=["Projects"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class ProjectCreate(BaseModel):
     name: str
     description: Optional[str] = None
@@ -40,8 +37,7 @@ class ProjectUpdate(BaseModel):
     sharepoint_url: Optional[str] = None
 
 @router.post("/projects")
-async def create_project(data: ProjectCreate, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def create_project(data: ProjectCreate, user_id: int, user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     if not Rbac.can_create_project(user):
         raise HTTPException(status_code=403, detail="Only admins can create projects")
     
@@ -70,25 +66,89 @@ async def create_project(data: ProjectCreate, user_id: int, db: Session = Depend
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating project: {str(e)}")
 
+# Sortieroptionen für GET /projects: Name -> (Sortierspalte, Cursor-Parser)
+PROJECT_SORT_OPTIONS = {
+    "id": (models.Project.id, int),
+    "name": (func.lower(models.Project.name), None),
+    "start_date": (models.Project.start_date, date.fromisoformat),
+    "end_date": (models.Project.end_date, date.fromisoformat),
+}
+
 @router.get("/projects")
-async def get_projects(user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def get_projects(
+    user_id: int,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    name: Optional[str] = None,
+    sort: str = "id",
+    order: str = "desc",
+    user: models.Users = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Gibt die sichtbaren Projekte des Users zurück.
+
+    - status: Nur Projekte mit diesem Status
+    - start_date / end_date: Nur Projekte, die diesen Zeitraum überschneiden
+    - name: Namens-Präfix (case-insensitive)
+    - sort: id, name, start_date, end_date (mit ID als Tie-Breaker), order: asc/desc
+    - limit / cursor: Keyset-Pagination, `next_cursor` der Antwort liefert die nächste Seite.
+      Ohne limit werden wie bisher alle Projekte zurückgegeben.
+    """
+    if sort not in PROJECT_SORT_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Use one of: {', '.join(PROJECT_SORT_OPTIONS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order. Use asc or desc")
+
+    sort_column, sort_parser = PROJECT_SORT_OPTIONS[sort]
+    columns = (sort_column, models.Project.id) if sort != "id" else (models.Project.id,)
+    parsers = [sort_parser, int] if sort != "id" else [int]
+
     try:
-        if user.is_admin:
-            projects = db.query(models.Project).order_by(models.Project.id.desc()).all()
-        else:
-            projects = db.query(models.Project).join(
+        # Sortierwert aus SQL mitselektieren: der Cursor muss exakt dem Wert entsprechen,
+        # nach dem die DB sortiert (lower() in Python und SQL unterscheiden sich z.B. bei Umlauten)
+        query = db.query(models.Project, sort_column.label("sort_key"))
+        if not user.is_admin:
+            query = query.join(
                 models.ProjectMember, models.Project.id == models.ProjectMember.project_id
-            ).filter(models.ProjectMember.user_id == user_id).order_by(models.Project.id.desc()).all()
-        
-        projects_formatted = [format_project_response(p, db) for p in projects]
-        return {"status": "ok", "projects": projects_formatted, "total": len(projects_formatted)}
+            ).filter(models.ProjectMember.user_id == user_id)
+
+        if status:
+            query = query.filter(models.Project.status == status)
+        if start_date:
+            query = query.filter(models.Project.end_date >= start_date)
+        if end_date:
+            query = query.filter(models.Project.start_date <= end_date)
+        if name:
+            pattern = name.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            query = query.filter(func.lower(models.Project.name).like(pattern, escape="\\"))
+
+        def cursor_key(row):
+            return (row.sort_key,) if sort == "id" else (row.sort_key, row.Project.id)
+
+        rows, next_cursor = keyset_paginate(
+            query, columns, cursor_key,
+            cursor=cursor, limit=limit, descending=(order == "desc"), parsers=parsers
+        )
+        projects = [row.Project for row in rows]
+
+        projects_formatted = format_projects_response(projects, db)
+        return {
+            "status": "ok",
+            "projects": projects_formatted,
+            "total": len(projects_formatted),
+            "next_cursor": next_cursor
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching projects: {str(e)}")
 
 @router.get("/projects/{project_id}")
-async def get_project_by_id(project_id: int, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def get_project_by_id(project_id: int, user_id: int, user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -97,8 +157,7 @@ async def get_project_by_id(project_id: int, user_id: int, db: Session = Depends
     return {"status": "ok", "project": format_project_response(project, db)}
 
 @router.put("/projects/{project_id}")
-async def update_project(project_id: int, data: ProjectUpdate, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def update_project(project_id: int, data: ProjectUpdate, user_id: int, user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -135,8 +194,7 @@ async def update_project(project_id: int, data: ProjectUpdate, user_id: int, db:
         raise HTTPException(status_code=500, detail=f"Error updating project: {str(e)}")
 
 @router.delete("/projects/{project_id}")
-async def delete_project(project_id: int, user_id: int, db: Session = Depends(get_db)):
-    user = get_user(user_id, db)
+async def delete_project(project_id: int, user_id: int, user: models.Users = Depends(get_current_user), db: Session = Depends(get_db)):
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
@@ -149,8 +207,19 @@ async def delete_project(project_id: int, user_id: int, db: Session = Depends(ge
         db.query(models.ProjectTodo).filter(models.ProjectTodo.project_id == project_id).delete()
         db.query(models.ProjectMilestone).filter(models.ProjectMilestone.project_id == project_id).delete()
         
+        # Projektbilder inkl. Blob-Referenzen entfernen, Dateien erst nach dem Commit löschen
+        storage_keys = [key for (key,) in db.query(models.ProjectImage.storage_key).filter(
+            models.ProjectImage.project_id == project_id
+        ).all()]
+        db.query(models.ProjectImage).filter(models.ProjectImage.project_id == project_id).delete()
+        for key in storage_keys:
+            detach_blob(db, key)
+        
         db.delete(project)
         db.commit()
+        Rbac.invalidate_membership_cache(db)
+        for key in set(storage_keys):
+            await run_in_threadpool(release_blob, key, db)
         return {
             "status": "ok",
             "message": f"Project '{project_name}' successfully deleted",
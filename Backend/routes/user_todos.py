@@ -1,22 +1,16 @@
 """User TODOs Routes"""
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime, date
-from database import SessionLocal
+from database import get_db
 import models
+import Rbac
 from utils.helpers import get_user
 
 router = APIRouter(tags=["User TODOs"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class UserTodoCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -91,6 +85,69 @@ async def get_user_todos(user_id: int, db: Session = Depends(get_db)):
     todos_formatted = [format_user_todo_response(t) for t in todos]
     return {"status": "ok", "todos": todos_formatted, "total": len(todos_formatted)}
 
+def query_user_tasks(db: Session, user: models.Users, date_from: Optional[date] = None, date_to: Optional[date] = None):
+    """
+    Persönliche TODOs des Users und ihm zugewiesene Projekt-TODOs
+    (nur sichtbare Projekte) als einheitliche Liste mit `source`.
+    Zwei Queries über (user_id, due_date) bzw. (assigned_to, due_date).
+    """
+    project_query = db.query(models.ProjectTodo, models.Project.name).join(
+        models.Project, models.Project.id == models.ProjectTodo.project_id
+    ).filter(models.ProjectTodo.assigned_to == user.id)
+    user_query = db.query(models.UserTodo).filter(models.UserTodo.user_id == user.id)
+
+    visible = Rbac.get_visible_project_ids(db, user)
+    if visible is not None:
+        project_query = project_query.filter(models.ProjectTodo.project_id.in_(visible))
+    if date_from:
+        project_query = project_query.filter(models.ProjectTodo.due_date >= date_from)
+        user_query = user_query.filter(models.UserTodo.due_date >= date_from)
+    if date_to:
+        project_query = project_query.filter(models.ProjectTodo.due_date <= date_to)
+        user_query = user_query.filter(models.UserTodo.due_date <= date_to)
+
+    tasks = [
+        {**format_user_todo_response(t), "source": "personal", "project_id": None, "project_name": None}
+        for t in user_query.all()
+    ]
+    if visible is None or visible:
+        tasks += [{
+            "id": t.id,
+            "user_id": user.id,
+            "title": t.title,
+            "description": t.description,
+            "status": t.status,
+            "priority": t.priority,
+            "due_date": str(t.due_date) if t.due_date else None,
+            "source": "project",
+            "project_id": t.project_id,
+            "project_name": project_name
+        } for t, project_name in project_query.all()]
+
+    tasks.sort(key=lambda t: (t["due_date"] is None, t["due_date"] or "", t["source"], t["id"]))
+    return tasks
+
+@router.get("/users/{user_id}/tasks")
+async def get_user_tasks(
+    user_id: int,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db)
+):
+    """
+    Gibt alle Aufgaben eines Users zurück: persönliche TODOs und die ihm
+    zugewiesenen Projekt-TODOs aller Projekte, die er sehen darf.
+
+    Parameters:
+    - from / to: optionaler Fälligkeitszeitraum (YYYY-MM-DD, inklusive)
+
+    Returns:
+    - Liste von Aufgaben mit `source` ("personal" oder "project"), sortiert nach Fälligkeit
+    """
+    user = get_user(user_id, db)
+    tasks = query_user_tasks(db, user, date_from, date_to)
+    return {"status": "ok", "tasks": tasks, "total": len(tasks)}
+
 @router.get("/users/{user_id}/todos/by-date/{date}")
 async def get_user_todos_by_date(user_id: int, date: str, db: Session = Depends(get_db)):
     """
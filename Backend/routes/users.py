@@ -1,23 +1,29 @@
 """User Management Routes"""
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile
-from fastapi.responses import Response
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Query, Header
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, or_, and_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime
-from database import SessionLocal
+from database import get_db, has_pg_trgm
 import models
-from utils.security import pwd_context
-import base64
+from utils.security import hash_password, hash_passwords_async
+from utils.user_import import parse_import_file, validate_import_rows, insert_users, ImportFormatError, MAX_HTTP_IMPORT_ROWS
+from utils.blob_store import get_blob_store
+from utils.images import (
+    THUMBNAIL_MEDIA_TYPE, thumbnail_variant, image_version, validate_size, generate_thumbnails, ensure_thumbnail,
+    save_image_upload, UploadTooLarge, UnsupportedImageType
+)
+from utils.streaming import blob_response, db_blob_response, content_version, make_etag, etag_matches, cache_headers, not_modified
+from utils.blob_refs import detach_blob, release_blob, unpin_blob
+from utils.pagination import keyset_paginate
 
 router = APIRouter(tags=["User Management"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+MAX_PROFILE_PICTURE_SIZE = 5 * 1024 * 1024  # 5MB
+MAX_IMPORT_SIZE = 5 * 1024 * 1024  # 5MB
 
 class UserData(BaseModel):
     email: EmailStr
@@ -28,6 +34,22 @@ class UpdateUserRequest(BaseModel):
     first_name: Optional[str] = None
     last_name: Optional[str] = None
 
+def avatar_fields(user_id: int, picture_id: Optional[int], storage_key: Optional[str]) -> dict:
+    """
+    Avatar-Angaben für User-Responses: Version (Content-Hash) und versionierte,
+    dauerhaft cachebare URLs. Bestandsbilder in der DB haben noch keine Version.
+    """
+    if picture_id is None:
+        return {"has_profile_picture": False, "avatar_version": None, "avatar_url": None, "avatar_thumbnail_url": None}
+    version = content_version(storage_key)
+    query = f"&v={image_version(storage_key, 'thumb')}" if version else ""
+    return {
+        "has_profile_picture": True,
+        "avatar_version": version,
+        "avatar_url": f"/profile-picture/{user_id}" + (f"?v={version}" if version else ""),
+        "avatar_thumbnail_url": f"/profile-picture/{user_id}?size=thumb{query}",
+    }
+
 @router.post("/adduser/")
 async def create_user(userdata: UserData, db: Session = Depends(get_db)):
     try:
@@ -35,7 +57,7 @@ async def create_user(userdata: UserData, db: Session = Depends(get_db)):
         if existing_user:
             raise HTTPException(status_code=400, detail="Email already exists")
         
-        hashed_password = pwd_context.hash(userdata.password)
+        hashed_password = await hash_password(userdata.password)
         db_user = models.Users(
             email=userdata.email,
             password=hashed_password,
@@ -46,60 +68,213 @@ async def create_user(userdata: UserData, db: Session = Depends(get_db)):
         db.refresh(db_user)
         
         return {"status": "ok", "message": "User created", "user_id": db_user.id}
+    except HTTPException:
+        # z.B. 400 (E-Mail existiert) oder 503 (Passwort-Pool ausgelastet) unverändert weitergeben
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/users/import")
+async def import_users(
+    admin_user_id: int,
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Legt viele User auf einmal an (CSV oder JSON, siehe utils/user_import).
+
+    Fehlerhafte Zeilen (ungültige E-Mail/Rolle, doppelt, existiert bereits)
+    werden übersprungen und in `errors` mit Zeilennummer gemeldet.
+    Höchstens MAX_HTTP_IMPORT_ROWS Zeilen, größere Importe über import_users.py.
+    - dry_run: nur prüfen, nichts anlegen
+    """
+    admin_user = db.get(models.Users, admin_user_id)
+    if not admin_user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not admin_user.is_admin:
+        raise HTTPException(status_code=403, detail="Only admins can import users")
+
+    data = await file.read(MAX_IMPORT_SIZE + 1)
+    if len(data) > MAX_IMPORT_SIZE:
+        raise HTTPException(status_code=400, detail="File too large. Maximum: 5MB")
+    try:
+        rows = parse_import_file(data, file.filename, file.content_type, MAX_HTTP_IMPORT_ROWS)
+    except ImportFormatError as e:
+        raise HTTPException(status_code=400, detail=f"{e} Use import_users.py for larger imports.")
+
+    try:
+        valid, errors = validate_import_rows(db, rows)
+        # Transaktion beenden, damit während des Hashings keine Verbindung belegt ist
+        db.rollback()
+        if dry_run:
+            return {
+                "status": "ok",
+                "dry_run": True,
+                "created": 0,
+                "valid": len(valid),
+                "failed": len(errors),
+                "users": [{"row": number, "id": None, "email": row.email} for number, row in valid],
+                "errors": errors
+            }
+
+        hashes = await hash_passwords_async([row.password for _, row in valid])
+        created = insert_users(db, valid, hashes)
+        db.commit()
+        return {
+            "status": "ok",
+            "dry_run": False,
+            "created": len(created),
+            "valid": len(valid),
+            "failed": len(errors),
+            "users": created,
+            "errors": errors
+        }
+    except IntegrityError:
+        # Zwischen Prüfung und INSERT hat ein anderer Request eine der E-Mails angelegt
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Some emails were created concurrently. Please retry the import.")
+    except HTTPException:
+        # 503 bei ausgelastetem Passwort-Pool
+        db.rollback()
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error importing users: {str(e)}")
+
+# Sortieroptionen für GET /users: Name -> (Sortierspalte, Cursor-Parser)
+USER_SORT_OPTIONS = {
+    "id": (models.Users.id, int),
+    "email": (func.lower(models.Users.email), None),
+    "last_name": (models.name_sort_key(models.Users.last_name), None),
+    "first_name": (models.name_sort_key(models.Users.first_name), None),
+}
+
+# Suchfelder für den Parameter q von GET /users
+USER_SEARCH_COLUMNS = (models.Users.email, models.Users.first_name, models.Users.last_name)
+
+def user_search_filter(term: str, fuzzy: bool = True):
+    """
+    Filter für einen Suchbegriff: jedes Wort muss in E-Mail, Vor- oder Nachname
+    vorkommen. Ohne fuzzy nur als Präfix (Index mit text_pattern_ops), mit
+    fuzzy zusätzlich als Teilstring und - falls pg_trgm installiert ist -
+    per Trigramm-Ähnlichkeit, damit auch Tippfehler noch Treffer liefern.
+    """
+    conditions = []
+    for word in term.lower().split():
+        escaped = word.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%" if fuzzy else f"{escaped}%"
+        matches = [func.lower(column).like(pattern, escape="\\") for column in USER_SEARCH_COLUMNS]
+        if fuzzy and has_pg_trgm():
+            matches += [func.lower(column).op("%")(word) for column in USER_SEARCH_COLUMNS]
+        conditions.append(or_(*matches))
+    return and_(*conditions)
+
 @router.get("/users")
-async def get_all_users(admin_user_id: int, db: Session = Depends(get_db)):
-    admin_user = db.query(models.Users).filter(models.Users.id == admin_user_id).first()
+async def get_all_users(
+    admin_user_id: int,
+    q: Optional[str] = None,
+    fuzzy: bool = True,
+    role: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=200),
+    cursor: Optional[str] = None,
+    sort: str = "id",
+    order: str = "asc",
+    db: Session = Depends(get_db)
+):
+    """
+    User-Verzeichnis (nur Admins).
+
+    - q: Suche in E-Mail, Vor- und Nachname (case-insensitive, mehrere Wörter = UND)
+    - fuzzy: false = nur Präfix-Suche, true = auch Teilstring und ähnliche Schreibweisen
+    - role: Nur User mit dieser Rolle
+    - sort: id, email, last_name, first_name (mit ID als Tie-Breaker), order: asc/desc
+    - limit / cursor: Keyset-Pagination, `next_cursor` der Antwort liefert die nächste Seite.
+      Ohne limit werden wie bisher alle User zurückgegeben.
+    """
+    admin_user = db.get(models.Users, admin_user_id)
     if not admin_user:
         raise HTTPException(status_code=404, detail="User not found")
     
     if not admin_user.is_admin:
         raise HTTPException(status_code=403, detail="Only admins can view all users")
     
+    if sort not in USER_SORT_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Use one of: {', '.join(USER_SORT_OPTIONS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="Invalid order. Use asc or desc")
+
+    sort_column, sort_parser = USER_SORT_OPTIONS[sort]
+    columns = (sort_column, models.Users.id) if sort != "id" else (models.Users.id,)
+    parsers = [sort_parser, int] if sort != "id" else [int]
+    
     try:
-        users = db.query(models.Users).order_by(models.Users.id).all()
-        
-        users_list = []
-        for user in users:
-            # Prüfe ob Profilbild in profile_pictures Tabelle existiert
-            has_picture = db.query(models.ProfilePicture).filter(
-                models.ProfilePicture.user_id == user.id
-            ).first() is not None
+        # Eine Query: Profilbild per LEFT JOIN, nur ID und storage_key (keine Bilddaten)
+        query = db.query(
+            models.Users.id,
+            models.Users.email,
+            models.Users.first_name,
+            models.Users.last_name,
+            models.Users.role,
+            models.Users.twofa_enabled,
+            models.ProfilePicture.id.label("picture_id"),
+            models.ProfilePicture.storage_key,
+            # Cursor aus dem Sortierwert der DB, nicht aus Python-lower() (Umlaute, ß)
+            sort_column.label("sort_key")
+        ).outerjoin(
+            models.ProfilePicture, models.ProfilePicture.user_id == models.Users.id
+        )
 
-            users_list.append({
-                "id": user.id,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "role": user.role,
-                "twofa_enabled": user.twofa_enabled,
-                "has_profile_picture": has_picture
-            })
+        if q and q.strip():
+            query = query.filter(user_search_filter(q, fuzzy))
+        if role:
+            query = query.filter(models.Users.role == role)
+
+        def cursor_key(row):
+            return (row.sort_key,) if sort == "id" else (row.sort_key, row.id)
+
+        rows, next_cursor = keyset_paginate(
+            query, columns, cursor_key,
+            cursor=cursor, limit=limit, descending=(order == "desc"), parsers=parsers
+        )
+        
+        users_list = [{
+            "id": row.id,
+            "email": row.email,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "role": row.role,
+            "twofa_enabled": row.twofa_enabled,
+            **avatar_fields(row.id, row.picture_id, row.storage_key)
+        } for row in rows]
         
         return {
             "status": "ok",
             "users": users_list,
-            "total": len(users_list)
+            "total": len(users_list),
+            "next_cursor": next_cursor
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
 
 @router.get("/getuserbyID/{user_id}")
 async def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
-    result = db.query(models.Users).filter(models.Users.id == user_id).first()
+    """
+    User-Daten ohne Bilddaten: das Profilbild wird über avatar_url /
+    avatar_thumbnail_url (GET /profile-picture/{user_id}) separat und cachebar geladen.
+    """
+    result = db.get(models.Users, user_id)
     if not result:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Lade Profilbild aus profile_pictures Tabelle
-    profile_picture_base64 = None
-    picture = db.query(models.ProfilePicture).filter(
+    # Nur ID und storage_key des Profilbilds, keine Bilddaten
+    picture = db.query(models.ProfilePicture.id, models.ProfilePicture.storage_key).filter(
         models.ProfilePicture.user_id == user_id
     ).first()
-    if picture:
-        profile_picture_base64 = base64.b64encode(picture.image_data).decode('utf-8')
     
     return {
         "id": result.id,
@@ -108,13 +283,13 @@ async def get_user_by_id(user_id: int, db: Session = Depends(get_db)):
         "last_name": result.last_name,
         "role": result.role,
         "twofa_enabled": result.twofa_enabled,
-        "profile_picture": profile_picture_base64
+        **avatar_fields(user_id, picture.id if picture else None, picture.storage_key if picture else None)
     }
 
 @router.put("/update-user/{user_id}")
 async def update_user(user_id: int, request: UpdateUserRequest, db: Session = Depends(get_db)):
     try:
-        user = db.query(models.Users).filter(models.Users.id == user_id).first()
+        user = db.get(models.Users, user_id)
         
         if not user:
             raise HTTPException(status_code=404, detail="User nicht gefunden")
@@ -152,45 +327,55 @@ async def upload_profile_picture(
     db: Session = Depends(get_db)
 ):
     try:
-        user = db.query(models.Users).filter(models.Users.id == user_id).first()
+        user = db.get(models.Users, user_id)
         if not user:
             raise HTTPException(status_code=404, detail="User nicht gefunden")
         
-        allowed_types = ["image/jpeg", "image/jpg", "image/png", "image/gif", "image/webp"]
-        if file.content_type not in allowed_types:
+        # Upload blockweise in den Blob Store streamen (inkl. Thumbnails), die DB speichert nur den Key
+        try:
+            storage_key, file_size, content_type = await save_image_upload(file, MAX_PROFILE_PICTURE_SIZE, db)
+        except UnsupportedImageType:
             raise HTTPException(status_code=400, detail="Ungültiger Dateityp. Erlaubt: JPG, PNG, GIF, WEBP")
-        
-        contents = await file.read()
-        
-        if len(contents) > 5 * 1024 * 1024:
+        except UploadTooLarge:
             raise HTTPException(status_code=400, detail="Datei zu groß. Maximum: 5MB")
-        
-        # Update oder Insert in profile_pictures Tabelle
-        existing = db.query(models.ProfilePicture).filter(
-            models.ProfilePicture.user_id == user_id
-        ).first()
-        
-        if existing:
-            existing.image_data = contents
-            existing.content_type = file.content_type
-            existing.updated_at = datetime.utcnow()
-        else:
-            db.add(models.ProfilePicture(
-                user_id=user_id,
-                image_data=contents,
-                content_type=file.content_type
-            ))
-        
-        db.commit()
-        
-        profile_picture_base64 = base64.b64encode(contents).decode('utf-8')
+        # Die Zeile übernimmt die Referenz aus pin_blob(), bei Fehlern wieder freigeben
+        try:
+            await generate_thumbnails(get_blob_store(), storage_key)
+            
+            # Update oder Insert in profile_pictures Tabelle
+            existing = db.query(models.ProfilePicture).filter(
+                models.ProfilePicture.user_id == user_id
+            ).first()
+            
+            old_key = None
+            if existing:
+                old_key = existing.storage_key
+                existing.storage_key = storage_key
+                existing.image_data = None
+                existing.content_type = content_type
+                existing.updated_at = datetime.utcnow()
+            else:
+                db.add(models.ProfilePicture(
+                    user_id=user_id,
+                    storage_key=storage_key,
+                    content_type=content_type
+                ))
+            
+            detach_blob(db, old_key)
+            db.commit()
+        except BaseException:
+            db.rollback()
+            await run_in_threadpool(unpin_blob, db, storage_key)
+            raise
+        if old_key != storage_key:
+            await run_in_threadpool(release_blob, old_key, db)
         
         return {
             "status": "ok",
             "message": "Profilbild erfolgreich hochgeladen",
-            "profile_picture": profile_picture_base64,
-            "file_size": len(contents),
-            "file_type": file.content_type
+            "profile_picture_url": f"/profile-picture/{user_id}?v={content_version(storage_key)}",
+            "file_size": file_size,
+            "file_type": content_type
         }
         
     except HTTPException:
@@ -200,16 +385,61 @@ async def upload_profile_picture(
         raise HTTPException(status_code=500, detail=f"Fehler beim Hochladen: {str(e)}")
 
 @router.get("/profile-picture/{user_id}")
-async def get_profile_picture(user_id: int, db: Session = Depends(get_db)):
+def get_profile_picture(
+    user_id: int,
+    size: Optional[str] = Query(None, description="original, thumb oder medium"),
+    v: Optional[str] = Query(None, description="Content-Version des Profilbilds"),
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """
+    Liefert das Profilbild als Binärdaten. Mit `size` als Thumbnail (WebP),
+    das beim ersten Abruf erzeugt wird. Noch nicht migrierte Bilder aus der DB
+    (siehe migrate_blobs.py) kommen immer als Original.
+
+    Caching: ETag = Content-Hash, If-None-Match wird vor dem Lesen der Datei
+    geprüft (304). Mit passender Version `v` ist die URL immutable.
+    """
+    size = validate_size(size)
     try:
-        picture = db.query(models.ProfilePicture).filter(
+        picture = db.query(
+            models.ProfilePicture.id,
+            models.ProfilePicture.storage_key,
+            models.ProfilePicture.content_type,
+            func.length(models.ProfilePicture.image_data).label("size")
+        ).filter(
             models.ProfilePicture.user_id == user_id
         ).first()
         
         if not picture:
             raise HTTPException(status_code=404, detail="Kein Profilbild vorhanden")
         
-        return Response(content=picture.image_data, media_type=picture.content_type or "image/jpeg")
+        storage_key = picture.storage_key
+        if not storage_key:
+            if not picture.size:
+                raise HTTPException(status_code=404, detail="Kein Profilbild vorhanden")
+            return db_blob_response(
+                models.ProfilePicture.image_data,
+                models.ProfilePicture.id == picture.id,
+                picture.size,
+                picture.content_type or "image/jpeg",
+                range_header
+            )
+        
+        immutable = v is not None and v == image_version(storage_key, size)
+        etag = make_etag(storage_key, thumbnail_variant(size))
+        if etag_matches(if_none_match, etag):
+            return not_modified(cache_headers(etag, immutable))
+        
+        store = get_blob_store()
+        if not store.exists(storage_key):
+            raise HTTPException(status_code=404, detail="Kein Profilbild vorhanden")
+        if size and ensure_thumbnail(store, storage_key, size):
+            headers = cache_headers(etag, immutable)
+            return blob_response(store, storage_key, THUMBNAIL_MEDIA_TYPE, range_header, headers, variant=thumbnail_variant(size))
+        headers = cache_headers(make_etag(storage_key), immutable and not size)
+        return blob_response(store, storage_key, picture.content_type or "image/jpeg", range_header, headers)
         
     except HTTPException:
         raise
@@ -226,8 +456,11 @@ async def delete_profile_picture(user_id: int, db: Session = Depends(get_db)):
         if not picture:
             raise HTTPException(status_code=404, detail="Kein Profilbild vorhanden")
         
+        storage_key = picture.storage_key
         db.delete(picture)
+        detach_blob(db, storage_key)
         db.commit()
+        await run_in_threadpool(release_blob, storage_key, db)
         
         return {"status": "ok", "message": "Profilbild erfolgreich gelöscht"}
         
@@ -239,13 +472,19 @@ async def delete_profile_picture(user_id: int, db: Session = Depends(get_db)):
 
 @router.delete("/deleteuser/{user_id}")
 async def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(models.Users).filter(models.Users.id == user_id).first()
+    user = db.get(models.Users, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     try:
+        # Profilbild wird per ON DELETE CASCADE entfernt, der Blob muss separat freigegeben werden
+        storage_key = db.query(models.ProfilePicture.storage_key).filter(
+            models.ProfilePicture.user_id == user_id
+        ).scalar()
         db.delete(user)
+        detach_blob(db, storage_key)
         db.commit()
+        await run_in_threadpool(release_blob, storage_key, db)
         return {
             "status": "ok",
             "message": f"User {user.email} successfully deleted",
@@ -0,0 +1,113 @@
+"""
+Test-Setup (pytest, im Backend-Verzeichnis: python -m pytest tests)
+
+Die Tests laufen gegen eine SQLite-Datei im Temp-Verzeichnis, PostgreSQL
+wird nicht benötigt. ARRAY-Spalten gibt es in SQLite nicht, sie werden dort
+als JSON gespeichert. Der Blob Store liegt ebenfalls im Temp-Verzeichnis.
+"""
+import datetime
+import importlib
+import os
+import sys
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="backend-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["BLOB_STORE"] = "local"
+os.environ["BLOB_STORE_PATH"] = os.path.join(_tmp, "blobs")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import sqlalchemy
+
+sqlalchemy.ARRAY = lambda item_type: sqlalchemy.JSON()
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+import database
+import models
+
+
+@pytest.fixture(autouse=True)
+def db_schema():
+    """Leere Datenbank pro Test"""
+    models.Base.metadata.drop_all(database.engine)
+    models.Base.metadata.create_all(database.engine)
+    yield
+
+
+@pytest.fixture
+def db():
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_client():
+    """TestClient mit den angegebenen Routern (ohne main.py, die z.B. reportlab braucht)"""
+    def make(*router_names):
+        app = FastAPI()
+        for name in router_names:
+            app.include_router(importlib.import_module(f"routes.{name}").router)
+        return TestClient(app)
+    return make
+
+
+class QueryCounter:
+    """Zählt die an die Datenbank gesendeten SQL-Statements"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+@pytest.fixture
+def query_counter():
+    counter = QueryCounter()
+    event.listen(database.engine, "before_cursor_execute", counter)
+    yield counter
+    event.remove(database.engine, "before_cursor_execute", counter)
+
+
+@pytest.fixture
+def seed_projects(db):
+    """
+    Legt Admin (id 1), Employee (id 2) und `n` Projekte an, jedes mit `members`
+    zusätzlichen Mitgliedern; der Employee ist Mitglied in allen Projekten.
+    """
+    def seed(n, members=2):
+        admin = models.Users(email="admin@example.com", password="x", role="admin", first_name="Ad", last_name="Min")
+        employee = models.Users(email="emp@example.com", password="x", role="employee")
+        db.add_all([admin, employee])
+        db.commit()
+        for i in range(n):
+            project = models.Project(
+                name=f"Projekt {i}", status="planning",
+                start_date=datetime.date(2026, 1, 1) + datetime.timedelta(days=i),
+                end_date=datetime.date(2026, 3, 1) + datetime.timedelta(days=i),
+                interim_dates=[], created_by=admin.id
+            )
+            db.add(project)
+            db.flush()
+            db.add(models.ProjectMember(project_id=project.id, user_id=employee.id))
+            for j in range(members):
+                member = models.Users(email=f"m{i}-{j}@example.com", password="x", role="employee")
+                db.add(member)
+                db.flush()
+                db.add(models.ProjectMember(project_id=project.id, user_id=member.id))
+            db.add(models.ProjectTodo(
+                project_id=project.id, title=f"Todo {i}", status="todo", created_by=admin.id,
+                assigned_to=employee.id, due_date=datetime.date(2026, 2, 1)
+            ))
+        db.commit()
+        return admin.id, employee.id
+    return seed
@@ -0,0 +1,103 @@
+"""HTTP Caching: ETags, If-None-Match/304 und versionierte URLs"""
+import hashlib
+import io
+import pytest
+from PIL import Image
+import models
+from utils import images
+from utils.streaming import etag_matches, make_etag, IMMUTABLE_CACHE_CONTROL
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('"abc"', True),
+    ('W/"abc"', True),
+    ('"x", "abc"', True),
+    ("*", True),
+    ('"abc-thumb"', False),
+    ("abc", False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_make_etag():
+    assert make_etag("abc") == '"abc"'
+    assert make_etag("abc", "thumb") == '"abc-thumb"'
+
+
+def test_thumbnail_version_changes_with_render_parameters(monkeypatch):
+    variant, version = images.thumbnail_variant("thumb"), images.image_version("a" * 64, "thumb")
+    assert images.THUMBNAIL_VERSION in variant and images.THUMBNAIL_VERSION in version
+    assert images.image_version("a" * 64) == "a" * 16
+    monkeypatch.setattr(images, "THUMBNAIL_VERSION", "neu")
+    assert images.thumbnail_variant("thumb") != variant
+    assert images.image_version("a" * 64, "thumb") != version
+
+
+@pytest.fixture
+def uploaded_image(db, make_client, seed_projects):
+    admin_id, _ = seed_projects(1, members=0)
+    client = make_client("project_images")
+    out = io.BytesIO()
+    Image.new("RGB", (64, 48), (30, 120, 30)).save(out, "PNG")
+    response = client.post(f"/projects/1/images?user_id={admin_id}", files={"file": ("a.png", out.getvalue(), "image/png")})
+    assert response.status_code == 200, response.text
+    listing = client.get("/projects/1/images").json()["images"][0]
+    return client, listing
+
+
+def test_raw_image_etag_and_304(db, uploaded_image):
+    client, listing = uploaded_image
+    key = db.query(models.ProjectImage.storage_key).scalar()
+
+    response = client.get(listing["raw_url"])
+    assert response.status_code == 200
+    assert response.headers["etag"] == make_etag(key)
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    response = client.get(listing["raw_url"], headers={"If-None-Match": make_etag(key)})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+@pytest.mark.parametrize("size", ["thumb", "medium"])
+def test_thumbnail_etag_and_url_carry_render_version(db, uploaded_image, size):
+    client, listing = uploaded_image
+    key = db.query(models.ProjectImage.storage_key).scalar()
+    url = listing["thumbnail_url" if size == "thumb" else "medium_url"]
+    assert f"size={size}" in url and f"v={images.image_version(key, size)}" in url
+
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == images.THUMBNAIL_MEDIA_TYPE
+    etag = response.headers["etag"]
+    assert etag == make_etag(key, images.thumbnail_variant(size))
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # Thumbnail aus älteren Render-Parametern: kein 304, sondern das aktuelle Thumbnail
+    stale = make_etag(key, size)
+    assert client.get(url, headers={"If-None-Match": stale}).status_code == 200
+
+
+def test_backfill_contract_pdf_hashes(db, seed_projects):
+    import datetime
+    from migrate_contract_hashes import backfill_pdf_hashes
+    admin_id, _ = seed_projects(1, members=0)
+    pdf = b"%PDF-1.4 Vertrag"
+    db.add_all([
+        models.Contract(
+            project_id=1, document_type="nda", title=f"Vertrag {i}", party_a="A", party_b="B",
+            contract_value=1.0, start_date=datetime.date(2024, 1, 1), end_date=datetime.date(2024, 12, 31),
+            pdf_content=pdf if i else None, created_by=admin_id
+        )
+        for i in range(3)
+    ])
+    db.commit()
+
+    assert backfill_pdf_hashes(batch_size=1) == 2
+    db.expire_all()
+    hashes = [h for (h,) in db.query(models.Contract.pdf_hash).order_by(models.Contract.id)]
+    assert hashes == [None] + [hashlib.sha256(pdf).hexdigest()] * 2
+    assert backfill_pdf_hashes() == 0
@@ -0,0 +1,56 @@
+"""Bestandsbilder (image_data in der DB) werden beim Lesen nur gestreamt, nicht migriert"""
+import models
+
+DATA = bytes(range(256)) * 8
+
+
+def _add_legacy_image(db, seed_projects):
+    admin_id, _ = seed_projects(1, members=0)
+    image = models.ProjectImage(
+        project_id=1, image_data=DATA, filename="alt.jpg", content_type="image/jpeg", uploaded_by=admin_id
+    )
+    picture = models.ProfilePicture(user_id=admin_id, image_data=DATA, content_type="image/png")
+    db.add_all([image, picture])
+    db.commit()
+    ids = image.id, admin_id
+    db.close()
+    return ids
+
+
+def _assert_not_migrated(db):
+    assert db.query(models.ProjectImage.storage_key).scalar() is None
+    assert db.query(models.ProfilePicture.storage_key).scalar() is None
+    assert db.query(models.StoredBlob).count() == 0
+
+
+def test_raw_and_thumbnail_request_stream_from_db(db, make_client, seed_projects):
+    image_id, _ = _add_legacy_image(db, seed_projects)
+    client = make_client("project_images")
+    for params in ({}, {"size": "thumb"}):
+        response = client.get(f"/projects/1/images/{image_id}/raw", params=params)
+        assert response.status_code == 200
+        assert response.content == DATA
+        assert response.headers["content-type"] == "image/jpeg"
+    _assert_not_migrated(db)
+
+
+def test_batch_includes_legacy_images(db, make_client, seed_projects):
+    image_id, _ = _add_legacy_image(db, seed_projects)
+    client = make_client("project_images")
+    response = client.get("/projects/1/images/batch", params={"ids": [image_id, 999], "size": "thumb"})
+    assert response.status_code == 200
+    assert response.headers["x-missing-image-ids"] == "999"
+    assert DATA in response.content
+    _assert_not_migrated(db)
+
+
+def test_profile_picture_streams_from_db(db, make_client, seed_projects):
+    _, user_id = _add_legacy_image(db, seed_projects)
+    client = make_client("users")
+    response = client.get(f"/profile-picture/{user_id}", params={"size": "thumb"})
+    assert response.status_code == 200
+    assert response.content == DATA
+    response = client.get(f"/profile-picture/{user_id}", headers={"Range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert response.content == DATA[:10]
+    _assert_not_migrated(db)
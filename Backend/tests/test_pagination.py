@@ -0,0 +1,102 @@
+"""Keyset-Pagination: Cursor-Kodierung und Blättern in GET /projects und GET /users"""
+from datetime import date
+import pytest
+from fastapi import HTTPException
+from utils.pagination import encode_cursor, decode_cursor
+
+
+def test_cursor_roundtrip():
+    cursor = encode_cursor([date(2026, 5, 1), 42])
+    assert decode_cursor(cursor, [date.fromisoformat, int]) == [date(2026, 5, 1), 42]
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", encode_cursor([1, 2]), encode_cursor({"a": 1})])
+def test_invalid_cursor(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, [int])
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("sort, order", [("id", "desc"), ("name", "asc"), ("start_date", "desc")])
+def test_projects_pages_cover_all_without_duplicates(make_client, seed_projects, sort, order):
+    admin_id, _ = seed_projects(7, members=0)
+    client = make_client("projects")
+    full = client.get("/projects", params={"user_id": admin_id, "sort": sort, "order": order}).json()
+    assert full["next_cursor"] is None
+
+    ids, cursor = [], None
+    while True:
+        params = {"user_id": admin_id, "sort": sort, "order": order, "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/projects", params=params).json()
+        ids += [p["id"] for p in page["projects"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert ids == [p["id"] for p in full["projects"]]
+    assert len(ids) == 7
+
+
+def test_projects_invalid_sort(make_client, seed_projects):
+    admin_id, _ = seed_projects(1)
+    client = make_client("projects")
+    assert client.get("/projects", params={"user_id": admin_id, "sort": "budget"}).status_code == 400
+    assert client.get("/projects", params={"user_id": admin_id, "cursor": "xx", "limit": 2}).status_code == 400
+
+
+# SQLite-lower() kennt nur ASCII, Python-lower() auch Umlaute: der Cursor muss aus dem SQL-Wert kommen
+NON_ASCII_NAMES = ["Äpfel", "apfel", "Zebra", "ärger", "Ölmühle", "Straße", "STRASSE"]
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_projects_name_pages_with_non_ascii_names(db, make_client, seed_projects, order):
+    import models
+    admin_id, _ = seed_projects(len(NON_ASCII_NAMES), members=0)
+    for project, name in zip(db.query(models.Project).order_by(models.Project.id), NON_ASCII_NAMES):
+        project.name = name
+    db.commit()
+    client = make_client("projects")
+    full = client.get("/projects", params={"user_id": admin_id, "sort": "name", "order": order}).json()
+
+    ids, cursor = [], None
+    for _ in range(len(NON_ASCII_NAMES) + 1):
+        params = {"user_id": admin_id, "sort": "name", "order": order, "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/projects", params=params).json()
+        ids += [p["id"] for p in page["projects"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert ids == [p["id"] for p in full["projects"]]
+    assert len(ids) == len(NON_ASCII_NAMES)
+
+
+@pytest.mark.parametrize("sort, order", [("last_name", "asc"), ("first_name", "desc"), ("email", "asc")])
+def test_users_pages_with_non_ascii_names(db, make_client, seed_projects, sort, order):
+    import models
+    admin_id, _ = seed_projects(0)
+    db.add_all([
+        models.Users(email=f"{name.lower()}-{i}@example.com", password="x", first_name=name, last_name=name)
+        for i, name in enumerate(NON_ASCII_NAMES)
+    ])
+    db.add(models.Users(email="Ohne.Namen@example.com", password="x"))
+    db.commit()
+    total = db.query(models.Users).count()
+    client = make_client("users")
+    base = {"admin_user_id": admin_id, "sort": sort, "order": order}
+    full = client.get("/users", params=base).json()
+
+    ids, cursor = [], None
+    for _ in range(total + 1):
+        params = {**base, "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/users", params=params).json()
+        ids += [u["id"] for u in page["users"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert ids == [u["id"] for u in full["users"]]
+    assert len(ids) == total
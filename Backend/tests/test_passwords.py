@@ -0,0 +1,41 @@
+"""Passwort-Pool: Überlast wird als 503 weitergegeben, nicht als 500"""
+import pytest
+import models
+import routes.auth
+from utils import security
+
+
+@pytest.fixture
+def full_queue(monkeypatch):
+    # Queue-Limit 0: jede Hash-Berechnung wird sofort abgelehnt
+    monkeypatch.setattr(security, "PASSWORD_MAX_QUEUE", 0)
+
+
+def test_create_user_passes_503_through(db, make_client, full_queue):
+    client = make_client("users")
+    response = client.post("/adduser/", json={"email": "neu@example.com", "password": "geheim"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert db.query(models.Users).count() == 0
+
+
+def test_create_user_duplicate_email_stays_400(db, make_client, seed_projects):
+    seed_projects(0)
+    client = make_client("users")
+    response = client.post("/adduser/", json={"email": "admin@example.com", "password": "geheim"})
+    assert response.status_code == 400
+
+
+def test_change_password_passes_503_through(db, make_client, seed_projects, full_queue, monkeypatch):
+    seed_projects(0)
+
+    async def accept(password, hashed):
+        return True
+
+    monkeypatch.setattr(routes.auth, "verify_password", accept)
+    client = make_client("auth")
+    response = client.post("/change-password", json={
+        "email": "admin@example.com", "current_password": "alt", "new_password": "neu"
+    })
+    assert response.status_code == 503
+    assert db.query(models.Users.password).filter(models.Users.email == "admin@example.com").scalar() == "x"
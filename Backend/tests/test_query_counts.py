@@ -0,0 +1,49 @@
+"""
+Query-Anzahl der Listen-Endpoints: fest und unabhängig von der Anzahl der
+Projekte, Mitglieder und TODOs (kein N+1). Admin und Employee unterscheiden
+sich, weil für Nicht-Admins zusätzlich die Mitgliedschaften geladen werden.
+"""
+import pytest
+
+# (Router, URL, Parameter, Queries als Admin, Queries als Employee)
+ENDPOINTS = [
+    ("projects", "/projects", {}, 3, 4),
+    ("dashboard", "/dashboard", {}, 6, 7),
+    ("project_members", "/projects/1/members", {}, 4, 5),
+    ("project_todos", "/projects/1/todos", {}, 3, 4),
+    ("calendar", "/calendar", {"from": "2026-01-01", "to": "2026-03-31"}, 4, 5),
+    ("user_todos", "/users/{employee_id}/tasks", {}, 4, 4),
+    ("project_milestone", "/milestones", {}, 2, 3),
+]
+
+
+@pytest.mark.parametrize("n", [3, 15])
+@pytest.mark.parametrize("router, url, params, admin_queries, employee_queries", ENDPOINTS, ids=[e[0] for e in ENDPOINTS])
+def test_query_count_is_constant(make_client, seed_projects, query_counter, n, router, url, params, admin_queries, employee_queries):
+    admin_id, employee_id = seed_projects(n, members=3)
+    client = make_client(router)
+    for user_id, expected in ((admin_id, admin_queries), (employee_id, employee_queries)):
+        query_counter.reset()
+        response = client.get(url.format(employee_id=employee_id), params={"user_id": user_id, **params})
+        assert response.status_code == 200, response.text
+        assert query_counter.count == expected
+
+
+@pytest.mark.parametrize("n", [3, 15])
+def test_users_query_count_is_constant(make_client, seed_projects, query_counter, n):
+    admin_id, _ = seed_projects(n, members=3)
+    client = make_client("users")
+    query_counter.reset()
+    response = client.get("/users", params={"admin_user_id": admin_id})
+    assert response.status_code == 200
+    assert response.json()["total"] == 2 + 3 * n
+    assert query_counter.count == 2
+
+
+def test_dashboard_member_count_matches_members(make_client, seed_projects):
+    admin_id, _ = seed_projects(3, members=3)
+    client = make_client("dashboard")
+    projects = client.get("/dashboard", params={"user_id": admin_id}).json()["projects"]
+    assert projects
+    for project in projects:
+        assert project["member_count"] == len(project["members"]) > 0
@@ -0,0 +1,59 @@
+"""Range Requests (parse_range) und Auslieferung von Bestandsbildern aus der DB"""
+import pytest
+from fastapi import HTTPException
+import database
+import models
+from utils.streaming import parse_range
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=5-2", "bytes=-0"])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(HTTPException) as exc:
+        parse_range(header, 1000)
+    assert exc.value.status_code == 416
+    assert exc.value.headers["Content-Range"] == "bytes */1000"
+
+
+@pytest.fixture
+def legacy_image(db, seed_projects):
+    """Bestandsbild, dessen Daten noch in der DB (image_data) liegen"""
+    admin_id, _ = seed_projects(1, members=0)
+    image = models.ProjectImage(
+        project_id=1, image_data=bytes(range(256)) * 4, filename="alt.jpg",
+        content_type="image/jpeg", uploaded_by=admin_id
+    )
+    db.add(image)
+    db.commit()
+    image_id = image.id
+    db.close()
+    return image_id
+
+
+def test_legacy_image_range(make_client, legacy_image):
+    client = make_client("project_images")
+    response = client.get(f"/projects/1/images/{legacy_image}/raw", headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == bytes(range(10, 20))
+    assert response.headers["Content-Range"] == "bytes 10-19/1024"
+
+
+def test_unsatisfiable_range_releases_connection(make_client, legacy_image):
+    client = make_client("project_images")
+    response = client.get(f"/projects/1/images/{legacy_image}/raw", headers={"Range": "bytes=5000-"})
+    assert response.status_code == 416
+    assert database.engine.pool.checkedout() == 0
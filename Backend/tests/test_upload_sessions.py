@@ -0,0 +1,81 @@
+"""Resumable Uploads: Chunks, Abschluss (nur einmal) und Aufräumen abgelaufener Sessions"""
+import io
+import os
+import time
+import pytest
+from PIL import Image
+import models
+from utils import upload_sessions
+
+CHUNK = upload_sessions.MIN_CHUNK_SIZE
+
+
+@pytest.fixture
+def image_bytes():
+    out = io.BytesIO()
+    Image.effect_noise((400, 400), 60).convert("RGB").save(out, "PNG")
+    return out.getvalue()
+
+
+@pytest.fixture
+def upload(make_client, seed_projects, image_bytes):
+    admin_id, _ = seed_projects(1, members=0)
+    client = make_client("project_images")
+    response = client.post(
+        "/projects/1/images/uploads", params={"user_id": admin_id},
+        json={"filename": "foto.png", "size": len(image_bytes), "chunk_size": CHUNK}
+    )
+    assert response.status_code == 200, response.text
+    session = response.json()
+    for index in reversed(range(session["total_chunks"])):
+        data = image_bytes[index * CHUNK:(index + 1) * CHUNK]
+        response = client.put(f"/projects/1/images/uploads/{session['upload_id']}/chunks/{index}", content=data)
+        assert response.status_code == 200, response.text
+    assert response.json()["missing_chunks"] == []
+    return client, session["upload_id"]
+
+
+def test_complete_creates_image_once(db, upload, image_bytes):
+    client, upload_id = upload
+    response = client.post(f"/projects/1/images/uploads/{upload_id}/complete")
+    assert response.status_code == 200, response.text
+    assert client.post(f"/projects/1/images/uploads/{upload_id}/complete").status_code == 404
+    assert db.query(models.ProjectImage).count() == 1
+
+
+def test_claimed_session_cannot_be_completed_twice(upload):
+    client, upload_id = upload
+    session = upload_sessions.get_session(upload_id, 1)
+    upload_sessions.claim_session(session)
+    with pytest.raises(Exception) as exc:
+        upload_sessions.claim_session(session)
+    assert exc.value.status_code == 409
+    assert client.put(f"/projects/1/images/uploads/{upload_id}/chunks/0", content=b"x" * CHUNK).status_code == 404
+
+
+def test_failed_complete_keeps_session(make_client, seed_projects):
+    admin_id, _ = seed_projects(1, members=0)
+    client = make_client("project_images")
+    session = client.post(
+        "/projects/1/images/uploads", params={"user_id": admin_id},
+        json={"filename": "x.txt", "size": CHUNK, "chunk_size": CHUNK}
+    ).json()
+    client.put(f"/projects/1/images/uploads/{session['upload_id']}/chunks/0", content=b"a" * CHUNK)
+    assert client.post(f"/projects/1/images/uploads/{session['upload_id']}/complete").status_code == 400
+    assert client.get(f"/projects/1/images/uploads/{session['upload_id']}").status_code == 200
+
+
+def test_cleanup_removes_expired_and_abandoned_sessions(upload, monkeypatch):
+    _, upload_id = upload
+    claimed = upload_sessions.create_session(1, 1, None, CHUNK, CHUNK)
+    upload_sessions.claim_session(claimed)
+    root = upload_sessions._sessions_root()
+
+    upload_sessions.cleanup_expired_sessions()
+    assert upload_id in os.listdir(root)
+
+    later = time.time() + upload_sessions.UPLOAD_SESSION_TTL + 10
+    monkeypatch.setattr(upload_sessions.time, "time", lambda: later)
+    upload_sessions.cleanup_expired_sessions()
+    assert upload_id not in os.listdir(root)
+    assert claimed["upload_id"] + ".complete" not in os.listdir(root)
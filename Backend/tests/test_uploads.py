@@ -0,0 +1,121 @@
+"""Streaming-Uploads: Typprüfung, Größenlimit, Ablage im Blob Store"""
+import hashlib
+import io
+import os
+import pytest
+from PIL import Image
+import models
+from utils.blob_store import get_blob_store
+from utils.images import thumbnail_variant
+
+
+def _png(size=(64, 48)) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(out, "PNG")
+    return out.getvalue()
+
+
+def _tmp_files():
+    tmp_dir = os.path.join(get_blob_store().root, ".tmp")
+    return os.listdir(tmp_dir) if os.path.isdir(tmp_dir) else []
+
+
+@pytest.fixture
+def user_id(seed_projects):
+    admin_id, _ = seed_projects(0)
+    return admin_id
+
+
+def test_profile_picture_upload_is_stored_by_hash(db, make_client, user_id):
+    client = make_client("users")
+    data = _png()
+    response = client.post(f"/upload-profile-picture/{user_id}", files={"file": ("a.png", data, "image/png")})
+    assert response.status_code == 200, response.text
+    key = db.query(models.ProfilePicture.storage_key).scalar()
+    store = get_blob_store()
+    assert store.read(key) == data
+    assert store.exists(key, thumbnail_variant("thumb"))
+    assert db.get(models.StoredBlob, key).ref_count == 1
+    assert _tmp_files() == []
+
+
+@pytest.mark.parametrize("data, detail", [
+    (b"%PDF-1.4 kein Bild", "Ungültiger Dateityp"),
+    (b"\x89PNG\r\n\x1a\n" + b"\0" * (5 * 1024 * 1024), "Datei zu groß"),
+])
+def test_profile_picture_upload_rejected(db, make_client, user_id, data, detail):
+    client = make_client("users")
+    response = client.post(f"/upload-profile-picture/{user_id}", files={"file": ("a.png", data, "image/png")})
+    assert response.status_code == 400
+    assert detail in response.json()["detail"]
+    assert db.query(models.ProfilePicture).count() == 0
+    assert _tmp_files() == []
+
+
+def test_upload_pins_blob_before_thumbnails(db, make_client, user_id, monkeypatch):
+    # Ein paralleles Löschen (release_blob) während der Thumbnail-Erzeugung darf
+    # die gerade hochgeladene Datei nicht entfernen
+    import database
+    import routes.users
+    from utils.blob_refs import release_blob
+    client = make_client("users")
+    original = routes.users.generate_thumbnails
+
+    async def concurrent_release(store, key):
+        other = database.SessionLocal()
+        try:
+            release_blob(key, other)
+        finally:
+            other.close()
+        await original(store, key)
+
+    monkeypatch.setattr(routes.users, "generate_thumbnails", concurrent_release)
+    data = _png()
+    response = client.post(f"/upload-profile-picture/{user_id}", files={"file": ("a.png", data, "image/png")})
+    assert response.status_code == 200, response.text
+    key = db.query(models.ProfilePicture.storage_key).scalar()
+    assert get_blob_store().read(key) == data
+    assert db.get(models.StoredBlob, key).ref_count == 1
+
+
+def test_failed_upload_releases_pin(db, make_client, user_id, monkeypatch):
+    import routes.users
+    client = make_client("users")
+
+    async def broken(store, key):
+        raise RuntimeError("Thumbnail fehlgeschlagen")
+
+    monkeypatch.setattr(routes.users, "generate_thumbnails", broken)
+    data = _png()
+    response = client.post(f"/upload-profile-picture/{user_id}", files={"file": ("a.png", data, "image/png")})
+    assert response.status_code == 500
+    assert db.query(models.StoredBlob).count() == 0
+    assert db.query(models.ProfilePicture).count() == 0
+    assert not get_blob_store().exists(hashlib.sha256(data).hexdigest())
+
+
+def test_reupload_same_picture_keeps_single_reference(db, make_client, user_id):
+    client = make_client("users")
+    data = _png()
+    for _ in range(2):
+        response = client.post(f"/upload-profile-picture/{user_id}", files={"file": ("a.png", data, "image/png")})
+        assert response.status_code == 200, response.text
+    key = db.query(models.ProfilePicture.storage_key).scalar()
+    db.expire_all()
+    assert db.get(models.StoredBlob, key).ref_count == 1
+    assert get_blob_store().exists(key)
+
+
+def test_oversized_upload_is_rejected_before_copying(db, make_client, user_id, monkeypatch):
+    # Die gespoolte Datei ist zu groß: es wird gar nicht erst in den Blob Store geschrieben
+    store = get_blob_store()
+
+    def no_writer():
+        raise AssertionError("writer() darf nicht aufgerufen werden")
+
+    monkeypatch.setattr(store, "writer", no_writer)
+    client = make_client("users")
+    data = _png() + b"\0" * (5 * 1024 * 1024)
+    response = client.post(f"/upload-profile-picture/{user_id}", files={"file": ("a.png", data, "image/png")})
+    assert response.status_code == 400
+    assert "Datei zu groß" in response.json()["detail"]
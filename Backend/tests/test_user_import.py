@@ -0,0 +1,126 @@
+"""Massen-Import von Usern: Parsen, Validierung, Endpoint und Hashing-Budget"""
+import asyncio
+import json
+import threading
+import time
+import pytest
+import models
+from utils import security
+from utils.user_import import ImportFormatError, MAX_HTTP_IMPORT_ROWS, parse_import_file, validate_import_rows
+
+
+def _csv(*lines) -> bytes:
+    return ("email,password,role\n" + "\n".join(lines)).encode()
+
+
+def test_parse_csv_and_json():
+    assert parse_import_file(_csv("a@example.com,pw,"), "users.csv") == [{"email": "a@example.com", "password": "pw"}]
+    data = json.dumps({"users": [{"email": "a@example.com", "password": "pw"}]}).encode()
+    assert parse_import_file(data) == [{"email": "a@example.com", "password": "pw"}]
+
+
+@pytest.mark.parametrize("data, filename", [
+    (b"\xff\xfe", "users.csv"),
+    (b"[kein json", "users.json"),
+    (b'{"foo": 1}', "users.json"),
+    (b"name,password\nx,y", "users.csv"),
+])
+def test_parse_rejects_invalid_files(data, filename):
+    with pytest.raises(ImportFormatError):
+        parse_import_file(data, filename)
+
+
+def test_parse_row_limit():
+    with pytest.raises(ImportFormatError):
+        parse_import_file(_csv("a@example.com,pw,", "b@example.com,pw,"), "users.csv", max_rows=1)
+
+
+def test_validate_reports_errors_with_row_numbers(db, seed_projects):
+    seed_projects(0)
+    rows = parse_import_file(_csv(
+        "neu@example.com,pw,employee",
+        "keine-email,pw,employee",
+        "rolle@example.com,pw,chef",
+        "neu@example.com,pw,employee",
+        "admin@example.com,pw,employee",
+        "leer@example.com,,employee",
+        "gast@example.com,pw,guest",
+    ), "users.csv")
+    valid, errors = validate_import_rows(db, rows)
+    assert [(number, row.email) for number, row in valid] == [(1, "neu@example.com"), (7, "gast@example.com")]
+    assert [error["row"] for error in errors] == [2, 3, 4, 5, 6]
+    assert "Duplicate email (row 1)" in errors[2]["error"]
+    assert errors[3]["error"] == "Email already exists"
+
+
+def test_import_endpoint_creates_valid_rows(db, make_client, seed_projects):
+    admin_id, _ = seed_projects(0)
+    client = make_client("users")
+    data = _csv("neu@example.com,pw,employee", "admin@example.com,pw,employee")
+    response = client.post(f"/users/import?admin_user_id={admin_id}", files={"file": ("users.csv", data, "text/csv")})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["created"], body["failed"]) == (1, 1)
+    user = db.query(models.Users).filter(models.Users.email == "neu@example.com").one()
+    assert user.password.startswith("$argon2")
+
+
+def test_import_endpoint_dry_run_creates_nothing(db, make_client, seed_projects):
+    admin_id, _ = seed_projects(0)
+    client = make_client("users")
+    response = client.post(
+        f"/users/import?admin_user_id={admin_id}&dry_run=true",
+        files={"file": ("users.csv", _csv("neu@example.com,pw,employee"), "text/csv")}
+    )
+    assert response.status_code == 200
+    assert response.json()["valid"] == 1
+    assert db.query(models.Users).filter(models.Users.email == "neu@example.com").count() == 0
+
+
+def test_import_endpoint_limits_rows(db, make_client, seed_projects):
+    admin_id, _ = seed_projects(0)
+    client = make_client("users")
+    data = _csv(*(f"u{i}@example.com,pw," for i in range(MAX_HTTP_IMPORT_ROWS + 1)))
+    response = client.post(f"/users/import?admin_user_id={admin_id}", files={"file": ("users.csv", data, "text/csv")})
+    assert response.status_code == 400
+    assert "import_users.py" in response.json()["detail"]
+
+
+def test_import_endpoint_passes_503_through(db, make_client, seed_projects, monkeypatch):
+    admin_id, _ = seed_projects(0)
+    monkeypatch.setattr(security, "PASSWORD_MAX_QUEUE", 0)
+    client = make_client("users")
+    data = _csv("neu@example.com,pw,employee")
+    response = client.post(f"/users/import?admin_user_id={admin_id}", files={"file": ("users.csv", data, "text/csv")})
+    assert response.status_code == 503
+    assert db.query(models.Users).filter(models.Users.email == "neu@example.com").count() == 0
+
+
+def test_bulk_hashing_uses_limited_password_slots(monkeypatch):
+    # Massen-Hashing läuft über den Passwort-Pool und belegt höchstens BULK_HASH_SLOTS Plätze
+    monkeypatch.setattr(security, "_password_slots", None)
+    monkeypatch.setattr(security, "_password_pool", None)
+    monkeypatch.setattr(security, "PASSWORD_WORKERS", 4)
+    monkeypatch.setattr(security, "BULK_HASH_SLOTS", 2)
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def fake_hash_many(passwords):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.02)
+        with lock:
+            running["now"] -= 1
+        return [f"hash:{password}" for password in passwords]
+
+    monkeypatch.setattr(security, "_hash_many", fake_hash_many)
+    completed = security.password_pool_stats()["completed"]
+    passwords = [str(i) for i in range(security.BULK_HASH_BATCH * 6 + 3)]
+    try:
+        hashes = asyncio.run(security.hash_passwords_async(passwords))
+    finally:
+        security.get_password_pool().shutdown(wait=True)
+    assert hashes == [f"hash:{password}" for password in passwords]
+    assert running["max"] == 2
+    assert security.password_pool_stats()["completed"] - completed == 7
@@ -0,0 +1,129 @@
+"""
+Referenzzählung für Blobs im Blob Store
+
+Gleicher Inhalt wird nur einmal gespeichert (Key = SHA-256), auch wenn er von
+mehreren Projektbildern und Profilbildern verwendet wird. `stored_blobs` zählt
+die Referenzen; die Datei wird erst gelöscht, wenn die letzte wegfällt.
+
+Ablauf:
+- Uploads: pin_blob() registriert die Referenz (eigener Commit), bevor die Datei
+  abgelegt wird; die neue Zeile übernimmt sie, bei Abbruch unpin_blob()
+- attach_blob()/detach_blob() in derselben Transaktion wie das Anlegen bzw.
+  Löschen der referenzierenden Zeile aufrufen
+- nach dem Commit release_blob() aufrufen, das die Datei ggf. löscht
+
+pin_blob() und release_blob() sperren den Key (PostgreSQL Advisory Lock), damit
+ein paralleles Löschen nie eine Datei entfernt, die gerade wieder referenziert wird.
+"""
+from typing import Optional
+from sqlalchemy import func, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from utils.blob_store import get_blob_store
+import models
+
+# Tabellen, deren storage_key auf den Blob Store zeigt
+_REFERENCING_MODELS = (models.ProjectImage, models.ProfilePicture)
+
+
+def _lock_key(db: Session, key: str):
+    """Sperrt den Key bis zum Ende der Transaktion (nur PostgreSQL)"""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": key})
+
+
+def attach_blob(db: Session, key: Optional[str], size: Optional[int] = None):
+    """Erhöht den Referenzzähler (legt den Eintrag bei der ersten Referenz an)"""
+    if not key:
+        return
+    updated = db.query(models.StoredBlob).filter(models.StoredBlob.key == key).update(
+        {models.StoredBlob.ref_count: models.StoredBlob.ref_count + 1}, synchronize_session=False
+    )
+    if updated:
+        return
+    try:
+        # Savepoint: legt ein paralleler Request denselben Blob gleichzeitig an,
+        # schlägt nur dieses INSERT fehl und es wird stattdessen hochgezählt
+        with db.begin_nested():
+            db.add(models.StoredBlob(key=key, size=size, ref_count=1))
+    except IntegrityError:
+        db.query(models.StoredBlob).filter(models.StoredBlob.key == key).update(
+            {models.StoredBlob.ref_count: models.StoredBlob.ref_count + 1}, synchronize_session=False
+        )
+
+
+def detach_blob(db: Session, key: Optional[str]):
+    """Verringert den Referenzzähler, bei 0 wird der Eintrag entfernt"""
+    if not key:
+        return
+    blob = db.query(models.StoredBlob).filter(models.StoredBlob.key == key).with_for_update().first()
+    if blob is None:
+        return
+    if blob.ref_count <= 1:
+        db.delete(blob)
+    else:
+        blob.ref_count -= 1
+
+
+def pin_blob(db: Session, key: str, size: Optional[int] = None):
+    """
+    Registriert eine Referenz und committet sie sofort - vor dem Ablegen der
+    Datei und vor Thumbnails/Transkodieren. Die danach angelegte Zeile übernimmt
+    diese Referenz (kein weiteres attach_blob), bei Abbruch unpin_blob() aufrufen.
+    """
+    _lock_key(db, key)
+    attach_blob(db, key, size)
+    db.commit()
+
+
+def unpin_blob(db: Session, key: Optional[str]):
+    """Gibt eine per pin_blob() registrierte Referenz wieder frei und löscht die Datei ggf."""
+    if not key:
+        return
+    detach_blob(db, key)
+    db.commit()
+    release_blob(key, db)
+
+
+def release_blob(key: Optional[str], db: Session):
+    """
+    Löscht einen Blob (inkl. Thumbnails), sobald er nicht mehr referenziert wird.
+    Nach dem Commit aufrufen. Zusätzlich zum Zähler werden die referenzierenden
+    Tabellen geprüft - Bilder von vor Einführung der Zählung haben keinen Eintrag.
+    """
+    if not key:
+        return
+    try:
+        # Prüfen und Löschen unter dem Lock, den auch pin_blob() nimmt
+        _lock_key(db, key)
+        if db.query(models.StoredBlob.key).filter(models.StoredBlob.key == key).first():
+            return
+        for model in _REFERENCING_MODELS:
+            if db.query(model.id).filter(model.storage_key == key).first():
+                return
+        get_blob_store().delete(key)
+    finally:
+        db.commit()
+
+
+def rebuild_blob_refs(db: Session) -> int:
+    """
+    Berechnet alle Referenzzähler aus den Tabellen neu (Migration / Reparatur,
+    nicht während parallel hochgeladen wird). Gibt die Anzahl der Blobs zurück.
+    """
+    counts = {}
+    for model in _REFERENCING_MODELS:
+        rows = db.query(model.storage_key, func.count(model.id)).filter(
+            model.storage_key.isnot(None)
+        ).group_by(model.storage_key).all()
+        for key, count in rows:
+            counts[key] = counts.get(key, 0) + count
+
+    store = get_blob_store()
+    db.query(models.StoredBlob).delete(synchronize_session=False)
+    db.add_all([
+        models.StoredBlob(key=key, size=store.size(key) if store.exists(key) else None, ref_count=count)
+        for key, count in counts.items()
+    ])
+    db.commit()
+    return len(counts)
@@ -0,0 +1,169 @@
+"""
+Blob Store für Binärdaten (Projektbilder etc.)
+
+Die Dateien liegen content-addressed im Dateisystem: der Key ist der SHA-256
+Hash des Inhalts, die DB speichert nur diesen Key. Gleicher Inhalt ergibt
+denselben Key und wird nur einmal abgelegt.
+
+Abgeleitete Dateien (z.B. Thumbnails) liegen als Varianten direkt neben dem
+Original (<key>.<variant>) und werden mit ihm gelöscht.
+
+Konfiguration (.env):
+- BLOB_STORE: Backend, aktuell nur "local" (Default)
+- BLOB_STORE_PATH: Verzeichnis für den lokalen Store (Default: Backend/storage/blobs)
+"""
+import glob
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_VARIANT_RE = re.compile(r"^[a-z0-9_-]+$")
+
+DEFAULT_BLOB_STORE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage", "blobs")
+
+
+class LocalBlobStore:
+    """Content-addressed Store im lokalen Dateisystem: <root>/<ab>/<cd>/<sha256>"""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key: str, variant: Optional[str] = None) -> str:
+        if len(key) != 64 or not all(c in "0123456789abcdef" for c in key):
+            raise ValueError(f"Invalid blob key: {key!r}")
+        filename = key
+        if variant is not None:
+            if not _VARIANT_RE.match(variant):
+                raise ValueError(f"Invalid blob variant: {variant!r}")
+            filename = f"{key}.{variant}"
+        return os.path.join(self.root, key[:2], key[2:4], filename)
+
+    def local_path(self, key: str, variant: Optional[str] = None) -> Optional[str]:
+        """Pfad im Dateisystem (für sendfile-artige Responses), None bei Remote-Stores"""
+        return self.path(key, variant)
+
+    def exists(self, key: str, variant: Optional[str] = None) -> bool:
+        return os.path.exists(self.path(key, variant))
+
+    def size(self, key: str, variant: Optional[str] = None) -> int:
+        return os.path.getsize(self.path(key, variant))
+
+    def put(self, data: bytes) -> str:
+        """Speichert `data` und gibt den Key (SHA-256) zurück"""
+        key = hashlib.sha256(data).hexdigest()
+        if not self.exists(key):
+            self._write_atomic(key, data)
+        return key
+
+    def writer(self) -> "BlobWriter":
+        """Schreibt einen Blob blockweise (z.B. Uploads), ohne ihn komplett im Speicher zu halten"""
+        return BlobWriter(self)
+
+    def put_variant(self, key: str, variant: str, data: bytes):
+        """Speichert eine abgeleitete Datei (z.B. Thumbnail) neben dem Original"""
+        self._write_atomic(key, data, variant)
+
+    def read(self, key: str, variant: Optional[str] = None) -> bytes:
+        with open(self.path(key, variant), "rb") as f:
+            return f.read()
+
+    def read_range(self, key: str, offset: int, length: int, variant: Optional[str] = None) -> bytes:
+        with open(self.path(key, variant), "rb") as f:
+            f.seek(offset)
+            return f.read(length)
+
+    def delete(self, key: str):
+        """Löscht den Blob inklusive aller Varianten"""
+        for path in [self.path(key)] + glob.glob(glob.escape(self.path(key)) + ".*"):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _write_atomic(self, key: str, data: bytes, variant: Optional[str] = None):
+        # Erst in Temp-Datei im selben Verzeichnis schreiben, dann umbenennen:
+        # parallele Leser sehen nie eine halb geschriebene Datei
+        target = self.path(key, variant)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class BlobWriter:
+    """
+    Schreibt einen Blob blockweise in eine Temp-Datei und berechnet dabei
+    Hash und Größe. Erst commit() legt ihn unter seinem Key ab; bei Abbruch
+    (abort() oder Exception im with-Block) wird die Temp-Datei gelöscht.
+    """
+
+    def __init__(self, store: LocalBlobStore):
+        self.store = store
+        self.size = 0
+        self._hash = hashlib.sha256()
+        tmp_dir = os.path.join(store.root, ".tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self._tmp_path = tempfile.mkstemp(dir=tmp_dir, prefix="upload-")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes):
+        self._file.write(chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    @property
+    def key(self) -> str:
+        """Key des bisher geschriebenen Inhalts (schon vor commit(), z.B. für pin_blob)"""
+        return self._hash.hexdigest()
+
+    def commit(self) -> str:
+        """Legt den Blob ab und gibt den Key zurück (existiert er schon, wird die Kopie verworfen)"""
+        self._file.close()
+        key = self.key
+        if self.store.exists(key):
+            os.remove(self._tmp_path)
+        else:
+            target = self.store.path(key)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(self._tmp_path, target)
+        self._tmp_path = None
+        return key
+
+    def abort(self):
+        self._file.close()
+        if self._tmp_path and os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+        self._tmp_path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._tmp_path:
+            self.abort()
+
+
+_blob_store = None
+
+
+def get_blob_store():
+    """Gibt den konfigurierten Blob Store zurück (Singleton)"""
+    global _blob_store
+    if _blob_store is None:
+        backend = os.getenv("BLOB_STORE", "local")
+        if backend != "local":
+            raise RuntimeError(f"Unknown BLOB_STORE backend: {backend}")
+        _blob_store = LocalBlobStore(os.getenv("BLOB_STORE_PATH", DEFAULT_BLOB_STORE_PATH))
+    return _blob_store
@@ -1,22 +1,91 @@
 """Helper Functions"""
-from fastapi import HTTPException
+from typing import Dict, Optional
+from fastapi import HTTPException, Depends
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from database import get_db
 import models
 
+def _user_cache(db: Session) -> dict:
+    """
+    Identity-Cache für Users pro Session (= pro Request).
+    Die Identity Map von SQLAlchemy hält Objekte nur schwach referenziert,
+    daher werden geladene User hier zusätzlich festgehalten.
+    """
+    return db.info.setdefault("users", {})
+
+def find_user(user_id: int, db: Session):
+    """Holt User (oder None) - pro Request höchstens eine Query je User"""
+    cache = _user_cache(db)
+    if user_id not in cache:
+        cache[user_id] = db.get(models.Users, user_id)
+    return cache[user_id]
+
 def get_user(user_id: int, db: Session):
-    """Holt User aus DB"""
-    user = db.query(models.Users).filter(models.Users.id == user_id).first()
+    """Holt User aus DB (404 falls nicht vorhanden)"""
+    user = find_user(user_id, db)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
+def get_users(user_ids, db: Session) -> dict:
+    """
+    Holt mehrere User als {id: User}.
+    Bereits im Request geladene User kommen aus dem Cache,
+    nur die fehlenden werden mit einer IN-Query nachgeladen.
+    """
+    cache = _user_cache(db)
+    ids = {user_id for user_id in user_ids if user_id is not None}
+    missing = ids - cache.keys()
+    if missing:
+        for user in db.query(models.Users).filter(models.Users.id.in_(missing)).all():
+            cache[user.id] = user
+        for user_id in missing:
+            cache.setdefault(user_id, None)
+    return {user_id: cache[user_id] for user_id in ids if cache[user_id] is not None}
+
+def get_current_user(user_id: int, db: Session = Depends(get_db)) -> models.Users:
+    """
+    Dependency: Lädt den aufrufenden User (Query-Parameter user_id) einmal pro Request.
+    Folgende Lookups desselben Users in diesem Request treffen den Cache.
+    """
+    return get_user(user_id, db)
+
 def format_project_response(project, db: Session):
     """Formatiert Project für Response"""
-    creator = db.query(models.Users).filter(models.Users.id == project.created_by).first()
-    member_count = db.query(models.ProjectMember).filter(
-        models.ProjectMember.project_id == project.id
-    ).count()
-    
+    return format_projects_response([project], db)[0]
+
+def format_projects_response(projects, db: Session, member_counts: Optional[Dict[int, int]] = None):
+    """
+    Formatiert eine Liste von Projects für Response (Batch).
+
+    Creator und Member-Anzahl werden für alle Projekte gemeinsam geladen:
+    unabhängig von der Anzahl der Projekte werden höchstens 2 Queries ausgeführt
+    (Creator per IN, Member-Anzahl per GROUP BY), bei leerer Liste keine.
+    Bereits im Request geladene Creator kosten keine Query, ebenso übergebene
+    `member_counts` (Projekt-ID -> Anzahl, z.B. aus bereits geladenen Mitgliedern).
+    """
+    if not projects:
+        return []
+
+    creator_ids = {p.created_by for p in projects}
+    project_ids = [p.id for p in projects]
+
+    creators = get_users(creator_ids, db)
+    if member_counts is None:
+        member_counts = dict(
+            db.query(models.ProjectMember.project_id, func.count(models.ProjectMember.id))
+            .filter(models.ProjectMember.project_id.in_(project_ids))
+            .group_by(models.ProjectMember.project_id)
+            .all()
+        )
+
+    return [
+        _serialize_project(p, creators.get(p.created_by), member_counts.get(p.id, 0))
+        for p in projects
+    ]
+
+def _serialize_project(project, creator, member_count: int):
     return {
         "id": project.id,
         "name": project.name,
@@ -31,4 +100,4 @@ def format_project_response(project, db: Session):
         "creator_email": creator.email if creator else None,
         "creator_name": f"{creator.first_name or ''} {creator.last_name or ''}".strip() if creator else None,
         "member_count": member_count
-    }
\ No newline at end of file
+    }
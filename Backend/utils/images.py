@@ -0,0 +1,345 @@
+"""
+Bildverarbeitung (Uploads, Thumbnails) mit Pillow
+
+Die Verarbeitung läuft in einem Prozess-Pool, damit weder der Event Loop noch
+andere Requests durch das CPU-lastige Dekodieren/Skalieren blockiert werden.
+Thumbnails werden als Varianten neben dem Original im Blob Store abgelegt.
+
+Konfiguration (.env):
+- IMAGE_WORKERS: Anzahl Worker-Prozesse (Default: min(4, CPU-Anzahl))
+- IMAGE_TRANSCODE_FORMAT: Uploads neu kodieren als "webp" oder "jpeg" (Default: aus)
+- IMAGE_MAX_DIMENSION: maximale Kantenlänge beim Transkodieren (Default: 2560)
+- IMAGE_QUALITY: Qualität beim Transkodieren (Default: 82)
+"""
+import asyncio
+import hashlib
+import io
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+from utils.blob_refs import pin_blob, unpin_blob
+from utils.blob_store import get_blob_store
+from utils.streaming import CHUNK_SIZE, content_version
+
+load_dotenv()
+
+# Feste Thumbnail-Größen: Name -> maximale Kantenlänge in Pixel
+THUMBNAIL_SIZES = {
+    "thumb": 256,
+    "medium": 1024,
+}
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_MEDIA_TYPE = "image/webp"
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_METHOD = 4
+
+# Version der Render-Parameter: steckt im Variantennamen im Blob Store, im ETag
+# und in ?v=. Ändern sich Größen, Format oder Qualität, werden Thumbnails neu
+# erzeugt und Clients/CDNs laden sie neu, obwohl der Content-Hash gleich bleibt.
+THUMBNAIL_VERSION = hashlib.sha256(repr(
+    (sorted(THUMBNAIL_SIZES.items()), THUMBNAIL_FORMAT, THUMBNAIL_QUALITY, THUMBNAIL_METHOD)
+).encode()).hexdigest()[:8]
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", min(4, os.cpu_count() or 1)))
+
+IMAGE_TRANSCODE_FORMAT = os.getenv("IMAGE_TRANSCODE_FORMAT", "").upper() or None
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", 2560))
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 82))
+
+TRANSCODE_MEDIA_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+TRANSCODE_EXTENSIONS = {"image/webp": ".webp", "image/jpeg": ".jpg"}
+if IMAGE_TRANSCODE_FORMAT and IMAGE_TRANSCODE_FORMAT not in TRANSCODE_MEDIA_TYPES:
+    raise RuntimeError(f"Unknown IMAGE_TRANSCODE_FORMAT: {IMAGE_TRANSCODE_FORMAT}")
+
+_pool = None
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """Prozess-Pool für die Bildverarbeitung (wird beim ersten Zugriff gestartet)"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+
+def shutdown_image_pool():
+    """Beendet den Prozess-Pool (beim Herunterfahren der App)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+class UploadTooLarge(Exception):
+    """Upload überschreitet die maximale Größe"""
+
+
+class UnsupportedImageType(Exception):
+    """Upload ist kein unterstütztes Bildformat"""
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Bestimmt den Bildtyp anhand der Magic Bytes (JPEG, PNG, GIF, WebP)"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+async def save_image_upload(file: UploadFile, max_size: int, db: Session) -> Tuple[str, int, str]:
+    """
+    Streamt einen Bild-Upload blockweise in den Blob Store und gibt
+    (storage_key, Größe, Content-Type) zurück.
+
+    Hash und Größe werden beim Schreiben berechnet, der Upload liegt nie
+    komplett im Speicher. Der Typ wird aus den Magic Bytes bestimmt, nicht aus
+    dem vom Client gesendeten Content-Type. Bei anderem Inhalt UnsupportedImageType.
+
+    Starlette hat die Datei beim Aufruf bereits in eine Temp-Datei gespoolt.
+    Überschreitet sie `max_size`, wird daher vor dem Kopieren in den Blob Store
+    abgelehnt (UploadTooLarge) - das Limit begrenzt den Blob Store, nicht den Empfang.
+
+    Der Blob ist beim Zurückkehren bereits per pin_blob() referenziert: die
+    neue Zeile übernimmt die Referenz, bei Abbruch unpin_blob() aufrufen.
+    """
+    if file.size is not None and file.size > max_size:
+        raise UploadTooLarge()
+    head = await file.read(CHUNK_SIZE)
+    content_type = sniff_image_type(head)
+    if content_type is None:
+        raise UnsupportedImageType()
+
+    # Schreiben, Hashen und commit() (Rename) laufen im Threadpool, nicht im Event Loop
+    writer = await run_in_threadpool(get_blob_store().writer)
+    try:
+        chunk = head
+        while chunk:
+            if writer.size + len(chunk) > max_size:
+                raise UploadTooLarge()
+            await run_in_threadpool(writer.write, chunk)
+            chunk = await file.read(CHUNK_SIZE)
+        # pin_blob/unpin_blob warten ggf. auf den Lock und committen: ebenfalls im Threadpool
+        key = writer.key
+        await run_in_threadpool(pin_blob, db, key, writer.size)
+        try:
+            await run_in_threadpool(writer.commit)
+        except BaseException:
+            await run_in_threadpool(unpin_blob, db, key)
+            raise
+        return key, writer.size, content_type
+    except BaseException:
+        await run_in_threadpool(writer.abort)
+        raise
+
+
+def store_image_chunks(chunks: Iterable[bytes], max_size: int, db: Session) -> Tuple[str, int, str]:
+    """
+    Wie save_image_upload, für bereits vorliegende Blöcke (z.B. zusammengesetzte
+    Chunks eines Resumable Uploads). Synchron - nicht im Event Loop aufrufen.
+    """
+    with get_blob_store().writer() as writer:
+        content_type = None
+        for chunk in chunks:
+            if content_type is None:
+                content_type = sniff_image_type(chunk)
+                if content_type is None:
+                    raise UnsupportedImageType()
+            if writer.size + len(chunk) > max_size:
+                raise UploadTooLarge()
+            writer.write(chunk)
+        if content_type is None:
+            raise UnsupportedImageType()
+        key = writer.key
+        pin_blob(db, key, writer.size)
+        try:
+            writer.commit()
+        except BaseException:
+            unpin_blob(db, key)
+            raise
+        return key, writer.size, content_type
+
+
+def thumbnail_variant(size: Optional[str]) -> Optional[str]:
+    """Name der Variante im Blob Store für eine Thumbnail-Größe (None = Original)"""
+    return f"{size}-{THUMBNAIL_VERSION}" if size else None
+
+
+def image_version(key: Optional[str], size: Optional[str] = None) -> Optional[str]:
+    """Wert für ?v=: Content-Hash, bei Thumbnails zusätzlich THUMBNAIL_VERSION"""
+    version = content_version(key)
+    return f"{version}-{THUMBNAIL_VERSION}" if version and size else version
+
+
+def validate_size(size: Optional[str]) -> Optional[str]:
+    """Prüft den size-Parameter (None = Original)"""
+    if size is None or size == "original":
+        return None
+    if size not in THUMBNAIL_SIZES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid size. Allowed: original, {', '.join(THUMBNAIL_SIZES)}"
+        )
+    return size
+
+
+def _render_thumbnails(source, sizes: Dict[str, int]) -> Dict[str, bytes]:
+    """Läuft im Worker-Prozess: erzeugt alle angeforderten Größen aus einem Original"""
+    from PIL import Image, ImageOps
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+
+        result = {}
+        for name, max_edge in sizes.items():
+            thumbnail = image.copy()
+            thumbnail.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            out = io.BytesIO()
+            thumbnail.save(out, THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY, method=THUMBNAIL_METHOD)
+            result[name] = out.getvalue()
+        return result
+
+
+def _transcode(source, fmt: str, max_dimension: int, quality: int) -> Optional[bytes]:
+    """
+    Läuft im Worker-Prozess: dreht nach EXIF-Orientierung, begrenzt die
+    Auflösung und kodiert neu. EXIF/XMP (Kamera, GPS etc.) werden dabei nicht
+    übernommen, nur das Farbprofil. Animierte Bilder bleiben unverändert (None).
+    """
+    from PIL import Image, ImageOps
+
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    with Image.open(source) as image:
+        if getattr(image, "is_animated", False):
+            return None
+        icc_profile = image.info.get("icc_profile")
+        image = ImageOps.exif_transpose(image)
+        if max(image.size) > max_dimension:
+            image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        if fmt == "JPEG" and has_alpha:
+            # JPEG kennt keine Transparenz: auf weißen Hintergrund legen
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if has_alpha and fmt == "WEBP" else "RGB")
+
+        out = io.BytesIO()
+        options = {"quality": quality, "icc_profile": icc_profile}
+        if fmt == "JPEG":
+            options.update(optimize=True, progressive=True)
+        else:
+            options.update(method=4)
+        image.save(out, fmt, **options)
+        return out.getvalue()
+
+
+async def transcode_image(store, key: str, size: int, content_type: str, db: Session) -> Tuple[str, int, str]:
+    """
+    Kodiert ein hochgeladenes Bild gemäß IMAGE_TRANSCODE_FORMAT neu (im Prozess-Pool)
+    und gibt (storage_key, Größe, Content-Type) des zu speichernden Blobs zurück.
+    Ist Transkodieren deaktiviert, schlägt es fehl oder wird die Datei dadurch
+    nicht kleiner, bleibt es beim Original. Ein neuer Blob ist wie bei
+    save_image_upload bereits gepinnt; das Original freigeben ist Sache des Aufrufers.
+    """
+    if not IMAGE_TRANSCODE_FORMAT:
+        return key, size, content_type
+    try:
+        source = store.local_path(key) or store.read(key)
+        future = get_image_pool().submit(
+            _transcode, source, IMAGE_TRANSCODE_FORMAT, IMAGE_MAX_DIMENSION, IMAGE_QUALITY
+        )
+        data = await asyncio.wrap_future(future)
+    except Exception as e:
+        print(f"Error transcoding {key}: {e}")
+        return key, size, content_type
+
+    if data is None or len(data) >= size:
+        return key, size, content_type
+    new_key = hashlib.sha256(data).hexdigest()
+    await run_in_threadpool(pin_blob, db, new_key, len(data))
+    try:
+        await run_in_threadpool(store.put, data)
+    except BaseException:
+        await run_in_threadpool(unpin_blob, db, new_key)
+        raise
+    return new_key, len(data), TRANSCODE_MEDIA_TYPES[IMAGE_TRANSCODE_FORMAT]
+
+
+def _submit(store, key: str, names: Iterable[str]) -> Future:
+    sizes = {name: THUMBNAIL_SIZES[name] for name in names}
+    # Lokale Dateien per Pfad übergeben, dann wird das Original nicht zwischen Prozessen kopiert
+    source = store.local_path(key) or store.read(key)
+    return get_image_pool().submit(_render_thumbnails, source, sizes)
+
+
+def _store_thumbnails(store, key: str, thumbnails: Dict[str, bytes]):
+    for name, data in thumbnails.items():
+        store.put_variant(key, thumbnail_variant(name), data)
+
+
+async def generate_thumbnails(store, key: str, names: Optional[Iterable[str]] = None):
+    """
+    Erzeugt Thumbnails für einen Blob (Default: alle Größen), z.B. direkt nach dem Upload.
+    Bereits vorhandene (gleicher Inhalt schon einmal hochgeladen) werden übersprungen.
+    Fehler (z.B. von Pillow nicht lesbare Formate) brechen den Upload nicht ab,
+    das Thumbnail wird dann beim ersten Abruf erneut versucht.
+    """
+    missing = [name for name in (names or THUMBNAIL_SIZES) if not store.exists(key, thumbnail_variant(name))]
+    if not missing:
+        return
+    try:
+        future = _submit(store, key, missing)
+        await run_in_threadpool(_store_thumbnails, store, key, await asyncio.wrap_future(future))
+    except Exception as e:
+        print(f"Error generating thumbnails for {key}: {e}")
+
+
+def ensure_thumbnail(store, key: str, size: str) -> bool:
+    """
+    Stellt sicher, dass das Thumbnail `size` existiert (Lazy-Erzeugung für
+    Bestandsbilder). Blockiert bis zur Fertigstellung - nur aus synchronen
+    Endpoints (laufen im Threadpool) aufrufen, nie direkt im Event Loop.
+    Gibt False zurück, wenn kein Thumbnail erzeugt werden kann (Original ausliefern).
+    """
+    if store.exists(key, thumbnail_variant(size)):
+        return True
+    try:
+        _store_thumbnails(store, key, _submit(store, key, [size]).result())
+        return True
+    except Exception as e:
+        print(f"Error generating thumbnail {size} for {key}: {e}")
+        return False
+
+
+def ensure_thumbnails(store, keys: Iterable[str], size: str) -> set:
+    """
+    Wie ensure_thumbnail für mehrere Blobs: fehlende Thumbnails werden parallel
+    im Prozess-Pool erzeugt. Gibt die Keys zurück, für die das Thumbnail vorliegt.
+    """
+    keys = set(keys)
+    futures = {key: _submit(store, key, [size]) for key in keys if not store.exists(key, thumbnail_variant(size))}
+    for key, future in futures.items():
+        try:
+            _store_thumbnails(store, key, future.result())
+        except Exception as e:
+            print(f"Error generating thumbnail {size} for {key}: {e}")
+    return {key for key in keys if store.exists(key, thumbnail_variant(size))}
+
@@ -0,0 +1,59 @@
+"""Keyset (Cursor) Pagination"""
+import base64
+import json
+from datetime import date
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+
+def encode_cursor(values) -> str:
+    """Kodiert die Sortierwerte des letzten Eintrags als opaken Cursor"""
+    payload = [v.isoformat() if isinstance(v, date) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, parsers) -> list:
+    """
+    Dekodiert einen Cursor. `parsers` enthält pro Sortierspalte eine Funktion,
+    die den JSON-Wert in den Spaltentyp umwandelt (oder None für unverändert).
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError("cursor length mismatch")
+        return [parse(v) if parse and v is not None else v for parse, v in zip(parsers, values)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_paginate(query, columns, key, cursor=None, limit=None, descending=False, parsers=None):
+    """
+    Sortiert `query` stabil nach `columns` (letzte Spalte muss eindeutig sein,
+    z.B. die ID) und liefert die Seite nach `cursor`.
+
+    Statt OFFSET wird per Zeilenvergleich `(a, b) > (x, y)` weitergeblättert,
+    damit jede Seite über einen passenden Index gleich schnell bleibt.
+
+    Returns:
+        (items, next_cursor) - next_cursor ist None auf der letzten Seite
+        oder wenn kein `limit` gesetzt ist.
+    """
+    order = [c.desc() if descending else c.asc() for c in columns]
+    query = query.order_by(*order)
+
+    if cursor:
+        values = decode_cursor(cursor, parsers or [None] * len(columns))
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+
+    if limit is None:
+        return query.all(), None
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        return rows[:limit], encode_cursor(key(rows[limit - 1]))
+    return rows, None
@@ -1,12 +1,201 @@
-"""Security Utilities"""
+"""
+Security Utilities
+
+Passwort-Hashing (argon2) kostet pro Aufruf mehrere zehn Millisekunden CPU.
+Damit der Event Loop dabei nicht blockiert, laufen hash/verify über
+hash_password() / verify_password() in einem eigenen Thread-Pool
+(argon2-cffi gibt während der Berechnung den GIL frei). Gleichzeitig laufen
+höchstens PASSWORD_WORKERS Berechnungen, weitere warten in einer Queue.
+Ist die Queue voll, wird mit 503 abgelehnt statt unbegrenzt zu stauen.
+
+Massen-Hashing im Request (POST /users/import) läuft über hash_passwords_async()
+in kleinen Paketen durch denselben Pool, dieselbe Queue und dasselbe Limit.
+Ein Import belegt dabei höchstens BULK_HASH_SLOTS der PASSWORD_WORKERS Plätze,
+die übrigen bleiben für Logins frei. Große Importe laufen über das CLI
+(import_users.py) mit hash_passwords() in einem eigenen Prozess-Pool.
+
+Konfiguration (.env):
+- PASSWORD_WORKERS: parallele Hash-Berechnungen (Default: min(4, CPU-Anzahl))
+- PASSWORD_MAX_QUEUE: maximal wartende Berechnungen (Default: 100)
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List
+from fastapi import HTTPException
+from dotenv import load_dotenv
 from passlib.context import CryptContext
 import pyotp
 from urllib.parse import quote
 import random
 import string
 
+load_dotenv()
+
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_MAX_QUEUE = int(os.getenv("PASSWORD_MAX_QUEUE", 100))
+
+# Massen-Hashing im Request: gleichzeitig belegte Plätze und Passwörter pro Job
+BULK_HASH_SLOTS = max(1, PASSWORD_WORKERS // 2)
+BULK_HASH_BATCH = 8
+
+_password_pool = None
+_password_slots = None
+_bulk_hash_pool = None
+
+# Kennzahlen des Pools (nur im Event Loop verändert, daher ohne Lock)
+_password_stats = {
+    "queued": 0,
+    "running": 0,
+    "max_queued": 0,
+    "completed": 0,
+    "failed": 0,
+    "rejected": 0,
+    "wait_seconds": 0.0,
+    "run_seconds": 0.0,
+}
+
+
+def get_password_pool() -> ThreadPoolExecutor:
+    """Thread-Pool für Passwort-Hashing (wird beim ersten Zugriff gestartet)"""
+    global _password_pool
+    if _password_pool is None:
+        _password_pool = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="password")
+    return _password_pool
+
+
+def get_bulk_hash_pool() -> ProcessPoolExecutor:
+    """Prozess-Pool für Massen-Hashing im CLI (wird beim ersten Zugriff gestartet)"""
+    global _bulk_hash_pool
+    if _bulk_hash_pool is None:
+        _bulk_hash_pool = ProcessPoolExecutor(max_workers=PASSWORD_WORKERS)
+    return _bulk_hash_pool
+
+
+def shutdown_password_pool():
+    """Beendet Thread- und Prozess-Pool (beim Herunterfahren der App)"""
+    global _password_pool, _bulk_hash_pool
+    if _password_pool is not None:
+        _password_pool.shutdown(wait=True, cancel_futures=True)
+        _password_pool = None
+    if _bulk_hash_pool is not None:
+        _bulk_hash_pool.shutdown(wait=True, cancel_futures=True)
+        _bulk_hash_pool = None
+
+
+async def _run_password_job(func, *args):
+    """Führt func(*args) im Pool aus, begrenzt auf PASSWORD_WORKERS gleichzeitig"""
+    global _password_slots
+    if _password_slots is None:
+        _password_slots = asyncio.Semaphore(PASSWORD_WORKERS)
+
+    stats = _password_stats
+    if stats["queued"] >= PASSWORD_MAX_QUEUE:
+        stats["rejected"] += 1
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent password operations, please retry",
+            headers={"Retry-After": "1"}
+        )
+
+    enqueued = time.perf_counter()
+    stats["queued"] += 1
+    stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+    try:
+        await _password_slots.acquire()
+    finally:
+        stats["queued"] -= 1
+
+    started = time.perf_counter()
+    stats["wait_seconds"] += started - enqueued
+    stats["running"] += 1
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(get_password_pool(), func, *args)
+        stats["completed"] += 1
+        return result
+    except Exception:
+        stats["failed"] += 1
+        raise
+    finally:
+        stats["running"] -= 1
+        stats["run_seconds"] += time.perf_counter() - started
+        _password_slots.release()
+
+
+async def hash_password(password: str) -> str:
+    """argon2-Hash eines Passworts, berechnet im Passwort-Pool"""
+    return await _run_password_job(pwd_context.hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    """Prüft ein Passwort gegen seinen Hash, berechnet im Passwort-Pool"""
+    return await _run_password_job(pwd_context.verify, password, hashed)
+
+
+def _hash_many(passwords: List[str]) -> List[str]:
+    """Läuft im Worker-Prozess bzw. im Passwort-Pool"""
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def _split(passwords: List[str]) -> List[List[str]]:
+    """Teilt die Passwörter in etwa 4 Pakete pro Worker (weniger IPC als einzeln)"""
+    size = max(1, -(-len(passwords) // (PASSWORD_WORKERS * 4)))
+    return [passwords[i:i + size] for i in range(0, len(passwords), size)]
+
+
+def hash_passwords(passwords: List[str]) -> List[str]:
+    """
+    Hasht viele Passwörter parallel im Prozess-Pool (Reihenfolge bleibt erhalten).
+    Nutzt alle PASSWORD_WORKERS ohne Rücksicht auf Logins - nur für das CLI.
+    """
+    if not passwords:
+        return []
+    return [h for batch in get_bulk_hash_pool().map(_hash_many, _split(passwords)) for h in batch]
+
+
+async def hash_passwords_async(passwords: List[str]) -> List[str]:
+    """
+    Hasht viele Passwörter im Request (Reihenfolge bleibt erhalten).
+    Pakete à BULK_HASH_BATCH laufen wie Logins über _run_password_job(),
+    höchstens BULK_HASH_SLOTS gleichzeitig. Bei voller Queue 503.
+    """
+    slots = asyncio.Semaphore(BULK_HASH_SLOTS)
+
+    async def run(batch: List[str]) -> List[str]:
+        async with slots:
+            return await _run_password_job(_hash_many, batch)
+
+    batches = [passwords[i:i + BULK_HASH_BATCH] for i in range(0, len(passwords), BULK_HASH_BATCH)]
+    tasks = [asyncio.ensure_future(run(batch)) for batch in batches]
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return [h for batch in results for h in batch]
+
+
+def password_pool_stats() -> dict:
+    """Aktuelle Auslastung und Kennzahlen des Passwort-Pools"""
+    stats = _password_stats
+    done = stats["completed"] + stats["failed"]
+    return {
+        "workers": PASSWORD_WORKERS,
+        "max_queue": PASSWORD_MAX_QUEUE,
+        "queued": stats["queued"],
+        "running": stats["running"],
+        "max_queued": stats["max_queued"],
+        "completed": stats["completed"],
+        "failed": stats["failed"],
+        "rejected": stats["rejected"],
+        "avg_wait_ms": round(stats["wait_seconds"] / done * 1000, 2) if done else 0.0,
+        "avg_run_ms": round(stats["run_seconds"] / done * 1000, 2) if done else 0.0,
+    }
+
 def generate_2fa_secret() -> str:
     return pyotp.random_base32()
 
@@ -0,0 +1,217 @@
+"""Binär-Streaming mit HTTP Range Support"""
+import os
+import re
+from typing import Callable, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from sqlalchemy import func
+from database import SessionLocal
+
+# Größe der Blöcke, in denen Binärdaten gelesen und gesendet werden
+CHUNK_SIZE = 512 * 1024
+
+# Optional: Auslieferung der Blob-Dateien an einen vorgeschalteten nginx delegieren
+# (X-Accel-Redirect), der sie per sendfile() inkl. Range Requests ausliefert.
+# Wert = interne nginx-Location, die auf BLOB_STORE_PATH zeigt, z.B. "/_blobs/".
+BLOB_ACCEL_REDIRECT_PREFIX = os.getenv("BLOB_ACCEL_REDIRECT_PREFIX")
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Wertet einen Range-Header aus und gibt (start, end) inklusive zurück.
+    None bedeutet: komplette Datei senden (kein oder nicht unterstützter Header,
+    z.B. mehrere Ranges). Nicht erfüllbare Ranges ergeben 416.
+    """
+    if not range_header:
+        return None
+    match = _RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix-Range: die letzten n Bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise _range_not_satisfiable(size)
+        return max(size - length, 0), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise _range_not_satisfiable(size)
+    return start, min(end, size - 1)
+
+
+def _range_not_satisfiable(size: int) -> HTTPException:
+    return HTTPException(
+        status_code=416,
+        detail="Requested range not satisfiable",
+        headers={"Content-Range": f"bytes */{size}"}
+    )
+
+
+def ranged_response(
+    read_chunk: Callable[[int, int], bytes],
+    size: int,
+    media_type: str,
+    range_header: Optional[str] = None,
+    headers: Optional[dict] = None,
+    on_close: Optional[Callable[[], None]] = None
+) -> StreamingResponse:
+    """
+    Streamt Binärdaten blockweise, mit 206 Partial Content bei gültigem Range-Header.
+
+    `read_chunk(offset, length)` liefert die Bytes ab `offset` (0-basiert); es wird
+    nie mehr als CHUNK_SIZE auf einmal angefordert, der Speicherbedarf pro Request
+    bleibt dadurch konstant. `on_close` wird nach dem Senden (oder Abbruch) aufgerufen.
+    """
+    byte_range = parse_range(range_header, size)
+    response_headers = {"Accept-Ranges": "bytes", **(headers or {})}
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response_headers["Content-Length"] = str(end - start + 1)
+
+    def iter_chunks():
+        try:
+            offset = start
+            while offset <= end:
+                length = min(CHUNK_SIZE, end - offset + 1)
+                chunk = read_chunk(offset, length)
+                if not chunk:
+                    break
+                yield chunk
+                offset += len(chunk)
+        finally:
+            if on_close:
+                on_close()
+
+    return StreamingResponse(
+        iter_chunks(), status_code=status_code, media_type=media_type, headers=response_headers
+    )
+
+
+def blob_response(
+    store,
+    key: str,
+    media_type: str,
+    range_header: Optional[str] = None,
+    headers: Optional[dict] = None,
+    variant: Optional[str] = None
+) -> Response:
+    """
+    Liefert einen Blob (bzw. eine Variante wie ein Thumbnail) aus dem Blob Store aus.
+    - mit BLOB_ACCEL_REDIRECT_PREFIX: nginx übernimmt die Auslieferung (sendfile)
+    - lokale Datei ohne Range: FileResponse, die Datei wird direkt vom Server gestreamt
+    - sonst: blockweise per ranged_response
+    """
+    headers = {"Accept-Ranges": "bytes", **(headers or {})}
+    path = store.local_path(key, variant)
+
+    if path and BLOB_ACCEL_REDIRECT_PREFIX:
+        relative = os.path.relpath(path, store.root).replace(os.sep, "/")
+        return Response(
+            media_type=media_type,
+            headers={**headers, "X-Accel-Redirect": BLOB_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + relative}
+        )
+
+    if path and parse_range(range_header, store.size(key, variant)) is None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    if path:
+        f = open(path, "rb")
+
+        def read_chunk(offset: int, length: int) -> bytes:
+            f.seek(offset)
+            return f.read(length)
+
+        try:
+            return ranged_response(read_chunk, store.size(key, variant), media_type, range_header, headers, on_close=f.close)
+        except BaseException:
+            f.close()
+            raise
+
+    return ranged_response(
+        lambda offset, length: store.read_range(key, offset, length, variant),
+        store.size(key, variant), media_type, range_header, headers
+    )
+
+
+
+def db_blob_response(
+    column,
+    row_filter,
+    size: int,
+    media_type: str,
+    range_header: Optional[str] = None,
+    headers: Optional[dict] = None
+) -> StreamingResponse:
+    """
+    Streamt Binärdaten aus einer DB-Spalte (Altbestand vor dem Blob Store)
+    blockweise per substr(), ohne sie komplett zu laden. Nur lesend - die
+    Migration in den Blob Store übernimmt migrate_blobs.py.
+
+    Der Stream bekommt eine eigene Session, unabhängig vom Request-Lebenszyklus.
+    """
+    stream_db = SessionLocal()
+
+    def read_chunk(offset: int, length: int) -> bytes:
+        return stream_db.query(func.substr(column, offset + 1, length)).filter(row_filter).scalar()
+
+    try:
+        return ranged_response(read_chunk, size, media_type, range_header, headers, on_close=stream_db.close)
+    except BaseException:
+        # z.B. 416 bei ungültiger Range: on_close wird dann nie aufgerufen
+        stream_db.close()
+        raise
+
+# HTTP Caching: Blobs sind content-addressed (Key = SHA-256), der Key ist damit ein starker ETag.
+# URLs mit passendem ?v=<Version> ändern ihren Inhalt nie und dürfen dauerhaft gecacht werden.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def content_version(key: Optional[str]) -> Optional[str]:
+    """Kurzform des Content-Hash für versionierte URLs (?v=...)"""
+    return key[:16] if key else None
+
+
+def make_etag(key: str, variant: Optional[str] = None) -> str:
+    return f'"{key}-{variant}"' if variant else f'"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Prüft einen If-None-Match Header (Liste, "*" und schwache Tags W/"..." erlaubt)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str, immutable: bool = False, private: bool = False) -> dict:
+    if immutable:
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = f"private, {REVALIDATE_CACHE_CONTROL}" if private else REVALIDATE_CACHE_CONTROL
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(headers: dict) -> Response:
+    """304 Not Modified mit ETag/Cache-Control, ohne Body"""
+    return Response(status_code=304, headers=headers)
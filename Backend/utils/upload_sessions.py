@@ -0,0 +1,239 @@
+"""
+Resumable Uploads (Session -> nummerierte Chunks -> Abschluss)
+
+Jede Upload-Session ist ein Verzeichnis im Blob Store (.uploads/<upload_id>/)
+mit den Metadaten (meta.json) und den bisher empfangenen Chunks
+(<index>.part). Bei Verbindungsabbruch muss der Client nur die fehlenden
+Chunks erneut senden. Abgelaufene Sessions räumt cleanup_loop() beim Start
+der App und danach regelmäßig auf.
+
+Zum Abschluss wird das Session-Verzeichnis per claim_session() atomar
+umbenannt (<upload_id>.complete), ein gleichzeitiger zweiter Abschluss
+bekommt dadurch 409 statt das Bild ein zweites Mal anzulegen.
+
+Konfiguration (.env):
+- UPLOAD_SESSION_TTL: Gültigkeit einer Session in Sekunden (Default: 24h)
+- UPLOAD_CLEANUP_INTERVAL: Abstand der Aufräumläufe in Sekunden (Default: 1h)
+"""
+import asyncio
+import json
+import os
+import re
+import secrets
+import shutil
+import tempfile
+import time
+from typing import AsyncIterator, Iterator, List, Optional
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from dotenv import load_dotenv
+from utils.blob_store import get_blob_store
+from utils.streaming import CHUNK_SIZE
+
+load_dotenv()
+
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL", 24 * 3600))
+UPLOAD_CLEANUP_INTERVAL = int(os.getenv("UPLOAD_CLEANUP_INTERVAL", 3600))
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 5 * 1024 * 1024
+
+_UPLOAD_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+_CLAIMED_SUFFIX = ".complete"
+_CLAIMED_RE = re.compile(r"^[0-9a-f]{32}\.complete$")
+
+
+def _sessions_root() -> str:
+    return os.path.join(get_blob_store().root, ".uploads")
+
+
+def _session_dir(upload_id: str) -> str:
+    if not _UPLOAD_ID_RE.match(upload_id):
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return os.path.join(_sessions_root(), upload_id)
+
+
+def _chunk_path(session: dict, index: int) -> str:
+    session_dir = _session_dir(session["upload_id"])
+    if session.get("claimed"):
+        session_dir += _CLAIMED_SUFFIX
+    return os.path.join(session_dir, f"{index:06d}.part")
+
+
+def expected_chunk_length(session: dict, index: int) -> int:
+    """Erwartete Länge von Chunk `index` (der letzte Chunk ist ggf. kürzer)"""
+    if index < session["total_chunks"] - 1:
+        return session["chunk_size"]
+    return session["size"] - session["chunk_size"] * (session["total_chunks"] - 1)
+
+
+def create_session(project_id: int, user_id: int, filename: Optional[str], size: int, chunk_size: int) -> dict:
+    upload_id = secrets.token_hex(16)
+    now = time.time()
+    session = {
+        "upload_id": upload_id,
+        "project_id": project_id,
+        "user_id": user_id,
+        "filename": filename,
+        "size": size,
+        "chunk_size": chunk_size,
+        "total_chunks": -(-size // chunk_size),
+        "created_at": now,
+        "expires_at": now + UPLOAD_SESSION_TTL,
+    }
+    os.makedirs(_session_dir(upload_id))
+    with open(os.path.join(_session_dir(upload_id), "meta.json"), "w") as f:
+        json.dump(session, f)
+    return session
+
+
+def get_session(upload_id: str, project_id: int) -> dict:
+    """Lädt eine Session (404 falls unbekannt, abgelaufen oder zu anderem Projekt gehörig)"""
+    try:
+        with open(os.path.join(_session_dir(upload_id), "meta.json")) as f:
+            session = json.load(f)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+    if session["project_id"] != project_id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if session["expires_at"] < time.time():
+        delete_session(upload_id)
+        raise HTTPException(status_code=404, detail="Upload session expired")
+    return session
+
+
+def received_chunks(session: dict) -> List[int]:
+    """Indizes der vollständig empfangenen Chunks"""
+    received = []
+    for name in os.listdir(_session_dir(session["upload_id"])):
+        if name.endswith(".part"):
+            received.append(int(name[:-5]))
+    return sorted(received)
+
+
+def missing_chunks(session: dict) -> List[int]:
+    received = set(received_chunks(session))
+    return [i for i in range(session["total_chunks"]) if i not in received]
+
+
+async def write_chunk(session: dict, index: int, stream: AsyncIterator[bytes]):
+    """
+    Schreibt Chunk `index` aus dem Request-Body (blockweise, Speicher bleibt
+    pro Chunk konstant). Ein erneut gesendeter Chunk ersetzt den alten.
+    Die Dateizugriffe laufen im Threadpool, nicht im Event Loop.
+    """
+    if not 0 <= index < session["total_chunks"]:
+        raise HTTPException(status_code=400, detail="Invalid chunk index")
+    expected = expected_chunk_length(session, index)
+
+    session_dir = _session_dir(session["upload_id"])
+    fd, tmp_path = await run_in_threadpool(tempfile.mkstemp, dir=session_dir, prefix=".tmp-")
+    f = os.fdopen(fd, "wb")
+    try:
+        written = 0
+        async for data in stream:
+            written += len(data)
+            if written > expected:
+                raise HTTPException(status_code=400, detail=f"Chunk too large. Expected {expected} bytes.")
+            await run_in_threadpool(f.write, data)
+        await run_in_threadpool(f.close)
+        if written != expected:
+            raise HTTPException(status_code=400, detail=f"Incomplete chunk. Expected {expected} bytes, got {written}.")
+        try:
+            await run_in_threadpool(os.replace, tmp_path, _chunk_path(session, index))
+        except FileNotFoundError:
+            # Session wurde inzwischen abgeschlossen oder gelöscht
+            raise HTTPException(status_code=404, detail="Upload session not found")
+    except BaseException:
+        await run_in_threadpool(_discard, f, tmp_path)
+        raise
+
+
+def _discard(f, path: str):
+    f.close()
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def iter_session_data(session: dict) -> Iterator[bytes]:
+    """Liest alle Chunks der Reihe nach blockweise (für den Abschluss)"""
+    for index in range(session["total_chunks"]):
+        with open(_chunk_path(session, index), "rb") as f:
+            while True:
+                data = f.read(CHUNK_SIZE)
+                if not data:
+                    break
+                yield data
+
+
+def delete_session(upload_id: str):
+    shutil.rmtree(_session_dir(upload_id), ignore_errors=True)
+
+
+def claim_session(session: dict) -> dict:
+    """
+    Reserviert eine Session für den Abschluss (atomares Umbenennen des
+    Verzeichnisses). Weitere Zugriffe auf die Session ergeben danach 404,
+    ein zweiter gleichzeitiger Abschluss 409. Anschließend finish_session()
+    oder bei Fehlern release_session() aufrufen.
+    """
+    session_dir = _session_dir(session["upload_id"])
+    try:
+        os.rename(session_dir, session_dir + _CLAIMED_SUFFIX)
+    except FileNotFoundError:
+        raise HTTPException(status_code=409, detail="Upload session is already being completed")
+    return {**session, "claimed": True}
+
+
+def release_session(session: dict):
+    """Gibt eine reservierte Session wieder frei (Abschluss fehlgeschlagen)"""
+    session_dir = _session_dir(session["upload_id"])
+    os.rename(session_dir + _CLAIMED_SUFFIX, session_dir)
+
+
+def finish_session(session: dict):
+    """Löscht eine reservierte Session nach erfolgreichem Abschluss"""
+    shutil.rmtree(_session_dir(session["upload_id"]) + _CLAIMED_SUFFIX, ignore_errors=True)
+
+
+def cleanup_expired_sessions():
+    """Löscht abgelaufene Sessions inkl. ihrer Chunks"""
+    root = _sessions_root()
+    if not os.path.isdir(root):
+        return
+    now = time.time()
+    for upload_id in os.listdir(root):
+        if _CLAIMED_RE.match(upload_id):
+            # Abschluss abgebrochen (z.B. Neustart während complete)
+            path = os.path.join(root, upload_id)
+            try:
+                if os.path.getmtime(path) + UPLOAD_SESSION_TTL < now:
+                    shutil.rmtree(path, ignore_errors=True)
+            except FileNotFoundError:
+                pass
+            continue
+        if not _UPLOAD_ID_RE.match(upload_id):
+            continue
+        try:
+            with open(os.path.join(root, upload_id, "meta.json")) as f:
+                expires_at = json.load(f)["expires_at"]
+        except (FileNotFoundError, ValueError, KeyError):
+            # Unvollständig angelegte Session: nach Alter des Verzeichnisses beurteilen
+            try:
+                expires_at = os.path.getmtime(os.path.join(root, upload_id)) + UPLOAD_SESSION_TTL
+            except FileNotFoundError:
+                continue
+        if expires_at < now:
+            delete_session(upload_id)
+
+
+async def cleanup_loop(interval: int = UPLOAD_CLEANUP_INTERVAL):
+    """Räumt abgelaufene Sessions sofort und danach alle `interval` Sekunden auf"""
+    while True:
+        try:
+            await run_in_threadpool(cleanup_expired_sessions)
+        except Exception as e:
+            print(f"Error cleaning up upload sessions: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,155 @@
+"""
+Massen-Import von Usern (CSV oder JSON)
+
+Statt pro Person POST /adduser/ (eigene Existenzprüfung, eigenes Hashing,
+eigener Commit) läuft ein Import in drei Schritten:
+- validate_import_rows(): Felder prüfen, alle E-Mails mit einer Query abgleichen
+- hash_passwords() (CLI, Prozess-Pool) / hash_passwords_async() (Request,
+  im Passwort-Pool neben den Logins): Passwörter parallel hashen
+- insert_users(): ein mehrzeiliges INSERT pro IMPORT_INSERT_BATCH Zeilen, ein Commit
+
+Fehlerhafte Zeilen werden übersprungen und mit Zeilennummer gemeldet,
+gültige Zeilen werden trotzdem angelegt.
+
+Dateiformat:
+- CSV mit Kopfzeile: email,password[,role,first_name,last_name]
+- JSON: Liste von Objekten mit denselben Feldern (oder {"users": [...]})
+"""
+import csv
+import io
+import json
+from typing import List, Optional, Tuple
+from pydantic import BaseModel, EmailStr, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+import models
+
+MAX_IMPORT_ROWS = 10000
+
+# Limit für POST /users/import - größere Dateien über import_users.py (CLI)
+MAX_HTTP_IMPORT_ROWS = 500
+
+# Zeilen pro INSERT-Statement (PostgreSQL erlaubt max. 65535 Parameter pro Statement)
+IMPORT_INSERT_BATCH = 1000
+
+VALID_ROLES = (models.UserRole.ADMIN, models.UserRole.EMPLOYEE, models.UserRole.GUEST)
+
+
+class ImportUserRow(BaseModel):
+    email: EmailStr
+    password: str
+    role: str = models.UserRole.EMPLOYEE
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+
+class ImportFormatError(Exception):
+    """Importdatei kann nicht gelesen werden"""
+
+
+def parse_import_file(data: bytes, filename: Optional[str] = None, content_type: Optional[str] = None,
+                      max_rows: int = MAX_IMPORT_ROWS) -> List[dict]:
+    """Liest CSV oder JSON (erkannt an Endung, Content-Type oder Inhalt) als Liste von Dicts"""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportFormatError("File must be UTF-8 encoded")
+
+    name = (filename or "").lower()
+    is_json = name.endswith(".json") or (content_type or "").endswith("json")
+    if not is_json and not name.endswith(".csv"):
+        is_json = text.lstrip()[:1] in ("[", "{")
+
+    if is_json:
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise ImportFormatError(f"Invalid JSON: {e}")
+        if isinstance(rows, dict):
+            rows = rows.get("users")
+        if not isinstance(rows, list):
+            raise ImportFormatError("JSON must be a list of users or an object with a 'users' list")
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        if not reader.fieldnames or "email" not in reader.fieldnames:
+            raise ImportFormatError("CSV needs a header row with at least 'email' and 'password'")
+        # Leere Zellen wie fehlende Felder behandeln
+        rows = [{k: v for k, v in row.items() if k and v not in (None, "")} for row in reader]
+
+    if len(rows) > max_rows:
+        raise ImportFormatError(f"Too many rows. Maximum is {max_rows}.")
+    return rows
+
+
+def _error_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+def validate_import_rows(db: Session, rows: List[dict]) -> Tuple[List[Tuple[int, ImportUserRow]], List[dict]]:
+    """
+    Prüft alle Zeilen (Zeilennummern ab 1, ohne Kopfzeile).
+    Returns:
+        (valid, errors) - valid: Liste (Zeile, ImportUserRow),
+        errors: Liste {"row", "email", "error"}
+    """
+    valid = []
+    errors = []
+    seen = {}
+    for number, raw in enumerate(rows, start=1):
+        if not isinstance(raw, dict):
+            errors.append({"row": number, "email": None, "error": "Row must be an object"})
+            continue
+        try:
+            row = ImportUserRow(**raw)
+        except ValidationError as e:
+            errors.append({"row": number, "email": raw.get("email"), "error": _error_message(e)})
+            continue
+        if not row.password:
+            errors.append({"row": number, "email": row.email, "error": "Password must not be empty"})
+        elif row.role not in VALID_ROLES:
+            errors.append({"row": number, "email": row.email, "error": f"Invalid role. Use one of: {', '.join(VALID_ROLES)}"})
+        elif row.email in seen:
+            errors.append({"row": number, "email": row.email, "error": f"Duplicate email (row {seen[row.email]})"})
+        else:
+            seen[row.email] = number
+            valid.append((number, row))
+
+    # Eine Query für alle E-Mails statt einer Existenzprüfung pro User
+    existing = set()
+    if seen:
+        existing = {email for (email,) in db.query(models.Users.email).filter(
+            models.Users.email.in_(list(seen))
+        ).all()}
+    if existing:
+        errors.extend(
+            {"row": number, "email": row.email, "error": "Email already exists"}
+            for number, row in valid if row.email in existing
+        )
+        valid = [(number, row) for number, row in valid if row.email not in existing]
+
+    errors.sort(key=lambda error: error["row"])
+    return valid, errors
+
+
+def insert_users(db: Session, valid: List[Tuple[int, ImportUserRow]], hashes: List[str]) -> List[dict]:
+    """
+    Legt die geprüften User mit mehrzeiligen INSERTs an (Commit durch den Aufrufer).
+    Returns: Liste {"row", "id", "email"}
+    """
+    created = []
+    for start in range(0, len(valid), IMPORT_INSERT_BATCH):
+        batch = valid[start:start + IMPORT_INSERT_BATCH]
+        values = [{
+            "email": row.email,
+            "password": hashed,
+            "role": row.role,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "twofa_enabled": False,
+        } for (_, row), hashed in zip(batch, hashes[start:start + IMPORT_INSERT_BATCH])]
+        result = db.execute(
+            insert(models.Users).values(values).returning(models.Users.id, models.Users.email)
+        )
+        ids = {email: user_id for user_id, email in result.all()}
+        created.extend({"row": number, "id": ids.get(row.email), "email": row.email} for number, row in batch)
+    return created
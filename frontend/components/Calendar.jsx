@@ -100,56 +100,37 @@ const Calendar = () => {
     try {
       setLoading(true);
       
-      // 1. Persönliche User-TODOs laden
-      const userTodosResponse = await fetch(`${API_URL}/users/${userId}/todos`);
-      const userTodosData = await userTodosResponse.json();
+      // 1. Persönliche TODOs und zugewiesene Projekt-TODOs in einem Request laden
+      const tasksResponse = await fetch(`${API_URL}/users/${userId}/tasks`);
+      const tasksData = await tasksResponse.json();
       
       let allTasks = [];
       
-      if (userTodosResponse.ok && userTodosData.status === "ok") {
-        allTasks = userTodosData.todos.map(todo => ({
-          ...todo,
-          source: 'personal',
-          project_name: null
-        }));
+      if (tasksResponse.ok && tasksData.status === "ok") {
+        allTasks = tasksData.tasks.map(task => task.source === 'project'
+          ? {
+              id: `project-${task.id}`,
+              title: task.title,
+              description: task.description,
+              status: task.status,
+              priority: task.priority,
+              due_date: task.due_date,
+              source: 'project',
+              project_id: task.project_id,
+              project_name: task.project_name,
+              original_id: task.id
+            }
+          : { ...task, source: 'personal', project_name: null }
+        );
       }
       
-      // 2. Alle Projekte des Users laden
+      // 2. Alle Projekte des Users laden (für Zwischentermine, Start und Ende)
       const projectsResponse = await fetch(`${API_URL}/projects?user_id=${userId}`);
       const projectsData = await projectsResponse.json();
       
       if (projectsResponse.ok && projectsData.status === "ok") {
         for (const project of projectsData.projects) {
           
-          // 3a. Projekt-TODOs laden (nur dem User zugewiesene)
-          try {
-            const projectTodosResponse = await fetch(
-              `${API_URL}/projects/${project.id}/todos?user_id=${userId}`
-            );
-            const projectTodosData = await projectTodosResponse.json();
-            
-            if (projectTodosResponse.ok && projectTodosData.status === "ok") {
-              const assignedTodos = projectTodosData.todos
-                .filter(todo => todo.assigned_to === parseInt(userId))
-                .map(todo => ({
-                  id: `project-${todo.id}`,
-                  title: todo.title,
-                  description: todo.description,
-                  status: todo.status,
-                  priority: todo.priority,
-                  due_date: todo.due_date,
-                  source: 'project',
-                  project_id: project.id,
-                  project_name: project.name,
-                  original_id: todo.id
-                }));
-              
-              allTasks = [...allTasks, ...assignedTodos];
-            }
-          } catch (error) {
-            console.log(`Could not load todos for project ${project.id}`);
-          }
-
           // 3b. ✅ NEU: Zwischentermine als Kalendereinträge hinzufügen
           if (project.interim_dates && project.interim_dates.length > 0) {
             const interimEntries = project.interim_dates.map((date, index) => ({
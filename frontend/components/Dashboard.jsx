@@ -54,37 +54,20 @@ const Dashboard = () => {
 
   const loadProjects = async (id) => {
     try {
-      const response = await fetch(`${API_URL}/projects?user_id=${id}`);
+      // Ein Request statt /projects + /members pro Projekt
+      const response = await fetch(`${API_URL}/dashboard?user_id=${id}`);
       const data = await response.json();
 
       if (response.ok && data.status === "ok") {
-        const formattedProjects = await Promise.all(
-          data.projects.map(async (p) => {
-            // Lade Members für jedes Projekt
-            let memberCount = 0;
-            try {
-              const membersResponse = await fetch(
-                `${API_URL}/projects/${p.id}/members?user_id=${id}`
-              );
-              const membersData = await membersResponse.json();
-              if (membersResponse.ok && membersData.status === "ok") {
-                memberCount = membersData.total || 0;
-              }
-            } catch (error) {
-              console.log(`Could not load members for project ${p.id}`);
-            }
-
-            return {
-              id: p.id,
-              title: p.name,
-              description: p.description,
-              progress: p.progress,
-              dueDate: p.due_date,
-              teamMembers: memberCount,
-              status: p.status
-            };
-          })
-        );
+        const formattedProjects = data.projects.map((p) => ({
+          id: p.id,
+          title: p.name,
+          description: p.description,
+          progress: p.progress,
+          dueDate: p.due_date,
+          teamMembers: p.member_count || 0,
+          status: p.status
+        }));
 
         setProjects(formattedProjects);
 
@@ -62,7 +62,7 @@ const Employees = () => {
     }
   };
 
-  // ✅ FIX: Profilbilder über getuserbyID laden (gibt profile_picture direkt als Base64 zurück)
+  // Profilbilder kommen als versionierte Thumbnail-URL direkt aus /users (kein Request pro User)
   const loadEmployees = async () => {
     try {
       setLoading(true);
@@ -73,24 +73,10 @@ const Employees = () => {
       if (response.ok) {
         const users = Array.isArray(data.users) ? data.users : [];
         
-        // Erst alle User ohne Bilder setzen (schnell)
-        setEmployees(users.map(u => ({ ...u, profile_picture: null })));
-        setLoading(false);
-
-        // ✅ FIX: Profilbilder über getuserbyID nachladen (hat_profile_picture existiert nicht im /users endpoint)
-        users.forEach(async (user) => {
-          try {
-            const userResponse = await fetch(`${API_URL}/getuserbyID/${user.id}`);
-            const userData = await userResponse.json();
-            if (userResponse.ok && userData.profile_picture) {
-              setEmployees(prev =>
-                prev.map(e => e.id === user.id ? { ...e, profile_picture: userData.profile_picture } : e)
-              );
-            }
-          } catch (err) {
-            console.log(`Could not load profile picture for user ${user.id}`);
-          }
-        });
+        setEmployees(users.map(u => ({
+          ...u,
+          profile_picture: u.avatar_thumbnail_url ? `${API_URL}${u.avatar_thumbnail_url}` : null
+        })));
       }
     } catch (error) {
       console.error("Error loading employees:", error);
@@ -322,7 +308,7 @@ const Employees = () => {
                   <View style={styles.employeeAvatar}>
                     {employee.profile_picture ? (
                       <Image
-                        source={{ uri: `data:image/jpeg;base64,${employee.profile_picture}` }}
+                        source={{ uri: employee.profile_picture }}
                         style={styles.employeeAvatarImage}
                       />
                     ) : (
@@ -458,7 +444,7 @@ const Employees = () => {
                   <View style={styles.employeeDetailAvatar}>
                     {selectedEmployee.profile_picture ? (
                       <Image
-                        source={{ uri: `data:image/jpeg;base64,${selectedEmployee.profile_picture}` }}
+                        source={{ uri: selectedEmployee.profile_picture }}
                         style={styles.employeeDetailAvatarImage}
                       />
                     ) : (
@@ -58,9 +58,9 @@ export default function Layout({ children }) {
         setUserFirstName(firstName);
         await AsyncStorage.setItem('user_first_name', firstName);
 
-        // ✅ FIX: Profilbild direkt aus getuserbyID laden (gibt profile_picture als Base64 zurück)
-        if (data.profile_picture) {
-          setProfilePicture(data.profile_picture);
+        // Profilbild als versionierte Thumbnail-URL (wird vom Image-Cache wiederverwendet)
+        if (data.avatar_thumbnail_url) {
+          setProfilePicture(`${API_URL}${data.avatar_thumbnail_url}`);
         }
       }
     } catch (error) {
@@ -151,7 +151,7 @@ export default function Layout({ children }) {
               <TouchableOpacity style={styles.userSectionMobile} onPress={handleProfilePress}>
                 <View style={styles.userAvatarMobile}>
                   {profilePicture ? (
-                    <Image source={{ uri: `data:image/jpeg;base64,${profilePicture}` }} style={styles.userAvatarImageMobile} />
+                    <Image source={{ uri: profilePicture }} style={styles.userAvatarImageMobile} />
                   ) : (
                     <MaterialCommunityIcons name="account-circle" size={50} color="#2b5fff" />
                   )}
@@ -254,7 +254,7 @@ export default function Layout({ children }) {
             <View style={styles.userAvatarContainer}>
               <View style={styles.userAvatar}>
                 {profilePicture ? (
-                  <Image source={{ uri: `data:image/jpeg;base64,${profilePicture}` }} style={styles.userAvatarImage} />
+                  <Image source={{ uri: profilePicture }} style={styles.userAvatarImage} />
                 ) : (
                   <Text style={styles.userAvatarText}>👤</Text>
                 )}
@@ -52,7 +52,7 @@ const Profile = ({ navigation }) => {
       setUserEmail(user_email);
 
       if (user_id) {
-        // ✅ FIX: getuserbyID gibt profile_picture direkt als Base64 zurück
+        // getuserbyID liefert nur die Avatar-URL, das Bild selbst wird (gecacht) separat geladen
         const response = await fetch(`${API_URL}/getuserbyID/${user_id}`);
         const data = await response.json();
 
@@ -62,8 +62,7 @@ const Profile = ({ navigation }) => {
             lastName: data.last_name || '',
             email: data.email || user_email || '',
             role: data.role || user_role || '',
-            // ✅ FIX: profile_picture kommt direkt aus dem getuserbyID Endpoint
-            profilePicture: data.profile_picture || null
+            profilePicture: data.avatar_thumbnail_url ? `${API_URL}${data.avatar_thumbnail_url}` : null
           });
 
           // 2FA Status laden
@@ -193,8 +192,8 @@ const Profile = ({ navigation }) => {
         // ✅ FIX: Bild neu laden über getuserbyID
         const refreshResponse = await fetch(`${API_URL}/getuserbyID/${userId}`);
         const refreshData = await refreshResponse.json();
-        if (refreshResponse.ok && refreshData.profile_picture) {
-          setProfileData(prev => ({ ...prev, profilePicture: refreshData.profile_picture }));
+        if (refreshResponse.ok && refreshData.avatar_thumbnail_url) {
+          setProfileData(prev => ({ ...prev, profilePicture: `${API_URL}${refreshData.avatar_thumbnail_url}` }));
         }
       } else {
         const msg = Array.isArray(data.detail) ? data.detail.map(e => e.msg).join(', ') : (data.detail || 'Upload fehlgeschlagen');
@@ -269,7 +268,7 @@ const Profile = ({ navigation }) => {
                 <View style={{ width: 120, height: 120, borderRadius: 60, backgroundColor: '#2b5fff',
                   justifyContent: 'center', alignItems: 'center', overflow: 'hidden' }}>
                   {profileData.profilePicture ? (
-                    <Image source={{ uri: `data:image/jpeg;base64,${profileData.profilePicture}` }}
+                    <Image source={{ uri: profileData.profilePicture }}
                       style={{ width: 120, height: 120, borderRadius: 60 }} />
                   ) : (
                     <Text style={{ fontSize: 60 }}>👤</Text>
@@ -1,10 +1,11 @@
 import React from "react";
-import { View, Text, ScrollView, TouchableOpacity, Modal } from "react-native";
+import { View, Text, ScrollView, TextInput, TouchableOpacity, Modal } from "react-native";
 import { styles } from "../../style/Projects.styles";
 
 const AddMemberModal = ({
   visible, onClose, onSave, loading,
-  allUsers, selectedUserId, setSelectedUserId
+  allUsers, selectedUserId, setSelectedUserId,
+  userSearch, setUserSearch, hasMoreUsers, onLoadMoreUsers
 }) => (
   <Modal animationType="fade" transparent={true} visible={visible} onRequestClose={onClose}>
     <View style={styles.modalOverlay}>
@@ -18,10 +19,19 @@ const AddMemberModal = ({
 
         <View style={styles.formGroup}>
           <Text style={styles.label}>Mitarbeiter auswählen</Text>
+          {/* Suche läuft serverseitig (Name oder E-Mail), Ergebnisse seitenweise */}
+          <TextInput
+            style={[styles.input, { marginBottom: 10 }]}
+            placeholder="Name oder E-Mail suchen..."
+            value={userSearch}
+            onChangeText={setUserSearch}
+            autoCapitalize="none"
+            autoCorrect={false}
+          />
           <ScrollView style={styles.userList}>
-            {allUsers.map((user, index) => (
+            {allUsers.map((user) => (
               <TouchableOpacity
-                key={index}
+                key={user.id}
                 style={[styles.userItem, selectedUserId === user.id && styles.userItemSelected]}
                 onPress={() => setSelectedUserId(user.id)}
               >
@@ -42,6 +52,14 @@ const AddMemberModal = ({
                 )}
               </TouchableOpacity>
             ))}
+            {allUsers.length === 0 && (
+              <Text style={styles.userItemEmail}>Keine Mitarbeiter gefunden</Text>
+            )}
+            {hasMoreUsers && (
+              <TouchableOpacity style={styles.userItem} onPress={onLoadMoreUsers}>
+                <Text style={styles.userItemName}>Weitere laden...</Text>
+              </TouchableOpacity>
+            )}
           </ScrollView>
         </View>
 
@@ -26,7 +26,7 @@ const API_URL = `http://${ip_adress}:8000`;
 // ─── Inline Image Gallery Modal ───────────────────────────────────────────────
 const ImageGalleryModal = ({ visible, onClose, project, isAdmin, canUpload }) => {
   const [images, setImages] = useState([]);
-  const [imageData, setImageData] = useState({}); // { [img.id]: base64string }
+  const [imageData, setImageData] = useState({}); // { [img.id]: Bild-URL }
   const [loading, setLoading] = useState(false);
   const [uploading, setUploading] = useState(false);
   const [selectedImage, setSelectedImage] = useState(null);
@@ -53,26 +53,11 @@ const ImageGalleryModal = ({ visible, onClose, project, isAdmin, canUpload }) =>
         const imgList = data.images || [];
         setImages(imgList);
         setLoading(false);
-        // Schritt 2: Bilddaten einzeln nachladen
-        imgList.forEach(async (img) => {
-          try {
-            const imgRes = await fetch(
-              `${API_URL}/projects/${project.id}/images/${img.id}?user_id=${id}`
-            );
-            const imgJson = await imgRes.json();
-            console.log(` Bild ${img.id} Response keys:`, Object.keys(imgJson));
-            console.log(` Bild ${img.id} image_data vorhanden:`, !!imgJson.image_data, "| Länge:", imgJson.image_data?.length || 0);
-            // Prüfe verschiedene mögliche Feldnamen
-            const base64 = imgJson.image_data || imgJson.data || imgJson.base64 || imgJson.content || null;
-            if (base64) {
-              setImageData(prev => ({ ...prev, [img.id]: base64 }));
-            } else {
-              console.warn(`❌ Kein Bilddaten-Feld gefunden für Bild ${img.id}:`, JSON.stringify(imgJson).slice(0, 200));
-            }
-          } catch (e) {
-            console.error("Bild laden fehlgeschlagen:", img.id, e);
-          }
-        });
+        // Schritt 2: Bilder direkt als Binär-URL laden (natives Caching, kein Base64)
+        setImageData(Object.fromEntries(imgList.map(img => [
+          img.id,
+          `${API_URL}${img.raw_url || `/projects/${project.id}/images/${img.id}/raw`}`
+        ])));
       } else {
         console.warn("❌ Images Metadaten Fehler:", data);
       }
@@ -210,7 +195,7 @@ const ImageGalleryModal = ({ visible, onClose, project, isAdmin, canUpload }) =>
                   {imageData[img.id] ? (
                     <Image
                       source={{
-                        uri: `data:${img.content_type || "image/jpeg"};base64,${imageData[img.id]}`
+                        uri: `${API_URL}${img.thumbnail_url || `/projects/${project.id}/images/${img.id}/raw?size=thumb`}`
                       }}
                       style={galleryStyles.thumbnail}
                       resizeMode="cover"
@@ -250,7 +235,7 @@ const ImageGalleryModal = ({ visible, onClose, project, isAdmin, canUpload }) =>
             </TouchableOpacity>
               <Image
                 source={{
-                  uri: `data:${selectedImage.content_type || "image/jpeg"};base64,${imageData[selectedImage.id]}`
+                  uri: `${imageData[selectedImage.id]}${imageData[selectedImage.id].includes('?') ? '&' : '?'}size=medium`
                 }}
                 style={galleryStyles.fullscreenImage}
                 resizeMode="contain"
@@ -535,6 +520,10 @@ const ProjectDetailModal = ({
   onCloseAddMember,
   onSaveAddMember,
   allUsers = [],
+  userSearch = "",
+  setUserSearch,
+  hasMoreUsers = false,
+  onLoadMoreUsers,
   selectedUserId,
   setSelectedUserId,
   editProjectModalVisible,
@@ -1071,6 +1060,10 @@ const ProjectDetailModal = ({
         onSave={onSaveAddMember}
         loading={loading}
         allUsers={allUsers}
+        userSearch={userSearch}
+        setUserSearch={setUserSearch}
+        hasMoreUsers={hasMoreUsers}
+        onLoadMoreUsers={onLoadMoreUsers}
         selectedUserId={selectedUserId}
         setSelectedUserId={setSelectedUserId}
       />
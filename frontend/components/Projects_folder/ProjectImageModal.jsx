@@ -132,7 +132,7 @@ const ProjectImageModal = ({ visible, onClose, project, isAdmin }) => {
                   <Text style={styles.fullscreenCloseText}>✕ Schließen</Text>
                 </TouchableOpacity>
                 <Image
-                  source={{ uri: `data:image/jpeg;base64,${selectedImage.image_data}` }}
+                  source={{ uri: `${API_URL}${selectedImage.medium_url || `/projects/${project.id}/images/${selectedImage.id}/raw?size=medium`}` }}
                   style={styles.fullscreenImage}
                   resizeMode="contain"
                 />
@@ -169,7 +169,7 @@ const ProjectImageModal = ({ visible, onClose, project, isAdmin }) => {
                   onPress={() => setSelectedImage(img)}
                 >
                   <Image
-                    source={{ uri: `data:image/jpeg;base64,${img.image_data}` }}
+                    source={{ uri: `${API_URL}${img.thumbnail_url || `/projects/${project.id}/images/${img.id}/raw?size=thumb`}` }}
                     style={styles.thumbnail}
                     resizeMode="cover"
                   />
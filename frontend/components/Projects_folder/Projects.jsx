@@ -21,6 +21,7 @@ import EditProjectModal from "./EditProjectModal";
 import EditTaskModal from "./EditTaskModal";
 
 const API_URL = `http://${ip_adress}:8000`;
+const USERS_PAGE_SIZE = 50;
 
 const Projects = () => {
   const [activeTab, setActiveTab] = useState("all");
@@ -38,6 +39,8 @@ const Projects = () => {
 
   const [projectsList, setProjectsList] = useState([]);
   const [allUsers, setAllUsers] = useState([]);
+  const [userSearch, setUserSearch] = useState("");
+  const [usersCursor, setUsersCursor] = useState(null);
   const [projectMembers, setProjectMembers] = useState([]);
   const [selectedUserId, setSelectedUserId] = useState(null);
   const [newInterimDate, setNewInterimDate] = useState("");
@@ -70,6 +73,13 @@ const Projects = () => {
     loadProjects();
   }, []);
 
+  // Mitarbeitersuche serverseitig, kurz verzögert nach der letzten Eingabe
+  useEffect(() => {
+    if (!addMemberModalVisible) return;
+    const timer = setTimeout(() => loadAllUsers(userSearch), 250);
+    return () => clearTimeout(timer);
+  }, [userSearch, addMemberModalVisible]);
+
   const addInterimDate = () => {
     if (newInterimDate && !newProject.interim_dates.includes(newInterimDate)) {
       setNewProject({
@@ -87,13 +97,18 @@ const Projects = () => {
     });
   };
 
-  const loadAllUsers = async () => {
+  // Lädt eine Seite der User-Suche; mit cursor wird die nächste Seite angehängt
+  const loadAllUsers = async (search = "", cursor = null) => {
     try {
       const id = await AsyncStorage.getItem('user_id');
-      const response = await fetch(`${API_URL}/users?admin_user_id=${id}`);
+      const params = new URLSearchParams({ admin_user_id: id, limit: String(USERS_PAGE_SIZE), sort: "last_name" });
+      if (search.trim()) params.append("q", search.trim());
+      if (cursor) params.append("cursor", cursor);
+      const response = await fetch(`${API_URL}/users?${params.toString()}`);
       const data = await response.json();
       if (response.ok && data.status === "ok") {
-        setAllUsers(data.users || []);
+        setAllUsers(cursor ? (prev) => [...prev, ...(data.users || [])] : (data.users || []));
+        setUsersCursor(data.next_cursor || null);
       } else {
         showError("Fehler", "User konnten nicht geladen werden");
       }
@@ -129,59 +144,28 @@ const Projects = () => {
         return;
       }
       setLoading(true);
-      const response = await fetch(`${API_URL}/projects?user_id=${id}`);
+      // Ein Request statt /projects + /members + /todos pro Projekt
+      const response = await fetch(`${API_URL}/dashboard?user_id=${id}`);
       const data = await response.json();
 
       if (response.ok && data.status === "ok") {
-        const formattedProjects = await Promise.all(
-          data.projects.map(async (p) => {
-            let memberCount = 0;
-            let todos = [];
-
-            try {
-              const membersResponse = await fetch(`${API_URL}/projects/${p.id}/members?user_id=${id}`);
-              const membersData = await membersResponse.json();
-              if (membersResponse.ok && membersData.status === "ok") {
-                memberCount = membersData.total || 0;
-              }
-            } catch (error) {
-              console.log(`Could not load members for project ${p.id}`);
-            }
-
-            try {
-              const todosResponse = await fetch(`${API_URL}/projects/${p.id}/todos?user_id=${id}`);
-              const todosData = await todosResponse.json();
-              if (todosResponse.ok && todosData.status === "ok") {
-                todos = todosData.todos.map(t => ({
-                  id: t.id,
-                  name: t.title,
-                  status: t.status,
-                  importance: t.priority,
-                  assignedTo: t.assignee?.name || null,
-                  dueDate: t.due_date || ""
-                }));
-              }
-            } catch (error) {
-              console.log(`Could not load todos for project ${p.id}`);
-            }
-
-            const calculatedProgress = calculateProgressFromTodos(todos);
-
-            return {
-              id: p.id,
-              title: p.name,
-              description: p.description,
-              progress: calculatedProgress,
-              startDate: p.start_date,
-              endDate: p.end_date,
-              interimDates: p.interim_dates || [],
-              sharepointUrl: p.sharepoint_url || null,
-              teamMembers: memberCount,
-              status: p.status,
-              tasks: todos
-            };
-          })
-        );
+        // Tasks werden erst beim Öffnen des Projekts geladen (openProjectDetail)
+        const formattedProjects = data.projects.map((p) => {
+          const counts = p.todo_counts || {};
+          return {
+            id: p.id,
+            title: p.name,
+            description: p.description,
+            progress: counts.total ? Math.round(((counts.completed || 0) / counts.total) * 100) : 0,
+            startDate: p.start_date,
+            endDate: p.end_date,
+            interimDates: p.interim_dates || [],
+            sharepointUrl: p.sharepoint_url || null,
+            teamMembers: p.member_count || 0,
+            status: p.status,
+            tasks: []
+          };
+        });
         setProjectsList(formattedProjects);
       } else {
         showError("Fehler", "Projekte konnten nicht geladen werden");
@@ -546,15 +530,20 @@ const Projects = () => {
     setProjectMembers([]);
   };
 
-  const openAddMemberModal = async () => {
+  const openAddMemberModal = () => {
     setSelectedUserId(null);
-    await loadAllUsers();
+    setUserSearch("");
+    setAllUsers([]);
+    setUsersCursor(null);
     setAddMemberModalVisible(true);
   };
   const closeAddMemberModal = () => {
     setAddMemberModalVisible(false);
     setSelectedUserId(null);
   };
+  const loadMoreUsers = () => {
+    if (usersCursor) loadAllUsers(userSearch, usersCursor);
+  };
 
   const openTaskModal = () => {
     setNewTask({ name: "", importance: "medium", assignedTo: "", dueDate: "" });
@@ -856,6 +845,10 @@ const Projects = () => {
         onCloseAddMember={closeAddMemberModal}
         onSaveAddMember={handleAddMember}
         allUsers={allUsers}
+        userSearch={userSearch}
+        setUserSearch={setUserSearch}
+        hasMoreUsers={!!usersCursor}
+        onLoadMoreUsers={loadMoreUsers}
         selectedUserId={selectedUserId}
         setSelectedUserId={setSelectedUserId}
         editProjectModalVisible={editProjectModalVisible}